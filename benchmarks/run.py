@@ -0,0 +1,282 @@
+"""
+Scalability benchmarks of the simset control plane.
+
+Every size builds a synthetic sweep of that many argument combinations in a
+temporary folder and times grid construction, script generation for each
+backend, simulation startup, info, info unsimulated, running the sweep,
+output and error lookup and post-processing. The timings, in seconds, are
+written as JSON so that they can be compared between commits:
+
+    python benchmarks/run.py --sizes 1000 10000 --output before.json
+    python benchmarks/run.py --sizes 1000 10000 --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+_main = '''\
+import dataclasses
+import os
+import sys
+import simset
+
+simset.data_folder = os.path.join(os.getcwd(), ".data")
+simset.python_interpreter = sys.executable
+simset.concurrent_jobs = {workers}
+simset.script_name = "main.py"
+
+
+@dataclasses.dataclass
+class Result:
+    value: int
+    time: dict
+
+
+@simset.arg("outer", list(range({outer})))
+@simset.arg("inner", list(range({inner})))
+def simulate_function(outer, inner):
+    return Result(value=outer * inner, time={{}})
+
+
+def post_processing_function(results):
+    for result in results:
+        pass
+
+
+def save(result, filename):
+    import pickle
+
+    with open(filename, "wb") as f:
+        pickle.dump(result, f, protocol=-1)
+
+
+def load(filename):
+    import pickle
+
+    with open(filename, "rb") as f:
+        return pickle.load(f)
+
+
+if __name__ == "__main__":
+    simset.command_line.command_line_simulate_process(
+        simulate_function=simulate_function,
+        process_function=post_processing_function,
+        save=save,
+        load=load,
+    )
+'''
+
+_backends = ["local", "parallel", "condor", "euler", "remote"]
+
+
+def _best(measure: Callable[[], float], repeat: int) -> float:
+    return min(measure() for _ in range(repeat))
+
+
+def _command(*arguments: str) -> Callable[[], float]:
+    """time a main.py command line, failing loudly if it fails"""
+
+    def measure() -> float:
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "main.py", *arguments],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        elapsed = time.perf_counter() - start
+        if process.returncode != 0:
+            raise Exception(
+                f"main.py {' '.join(arguments)} failed:\n{process.stderr.decode()}"
+            )
+        return elapsed
+
+    return measure
+
+
+def _grid(size: int, repeat: int) -> Dict[str, float]:
+    """time the lazy grid in this process"""
+    from simset.grid import Grid
+
+    def construct() -> Grid:
+        grid = Grid()
+        grid.add_axis("outer", range(10))
+        grid.add_axis("inner", range(size // 10))
+        return grid
+
+    def construction() -> float:
+        start = time.perf_counter()
+        construct()
+        return time.perf_counter() - start
+
+    def hashes() -> float:
+        grid = construct()
+        start = time.perf_counter()
+        for _ in grid.hashes():
+            pass
+        return time.perf_counter() - start
+
+    def lookup() -> float:
+        grid = construct()
+        last = grid[len(grid) - 1]
+        import simset
+
+        item_hash = simset.hash_to_filename(last)
+        start = time.perf_counter()
+        grid.by_hash[item_hash]
+        return time.perf_counter() - start
+
+    return {
+        "grid_construction": _best(construction, repeat),
+        "grid_hashes": _best(hashes, repeat),
+        "grid_first_lookup": _best(lookup, repeat),
+    }
+
+
+def benchmark(size: int, repeat: int, workers: int) -> Dict[str, float]:
+    """all timings of a synthetic sweep of size points"""
+    if size < 10 or size % 10:
+        raise Exception(f"sizes must be multiples of 10, got {size}")
+    results = _grid(size, repeat)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="simset-benchmark-") as folder:
+        os.chdir(folder)
+        try:
+            with open("main.py", "w") as f:
+                f.write(_main.format(workers=workers, outer=10, inner=size // 10))
+            for backend in _backends:
+                arguments = ["simulate", "setup", backend]
+                if backend == "remote":
+                    arguments.append("benchmark-host")
+                results[f"setup_{backend}"] = _best(_command(*arguments), repeat)
+            results["execute_startup"] = _best(
+                _command("simulate", "execute", "-i", "1"), repeat
+            )
+            results["info"] = _best(_command("info"), repeat)
+            results["info_unsimulated"] = _best(_command("info", "unsimulated"), repeat)
+            chunk_size = str(max(1, size // (16 * workers)))
+            results["run"] = _command(
+                "simulate", "run", "-w", str(workers), "-c", chunk_size
+            )()
+            results["info_finished"] = _best(_command("info"), repeat)
+            results["output"] = _best(_command("output", "1"), repeat)
+            results["error"] = _best(_command("error", "1"), repeat)
+            results["process"] = _best(_command("process"), repeat)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def _commit() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """print the timings relative to baseline and return the regressions"""
+    regressions = []
+    for size, timings in results["timings"].items():
+        previous = baseline["timings"].get(size, {})
+        for name, seconds in timings.items():
+            if name not in previous:
+                continue
+            ratio = seconds / max(previous[name], 1e-9)
+            flag = ""
+            if ratio > tolerance:
+                flag = "  regression"
+                regressions.append(f"{name} at {size}")
+            print(
+                f"{size:>8} {name:<20} {previous[name]:10.4f} s -> {seconds:10.4f} s  x{ratio:.2f}{flag}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="benchmark how the simset control plane scales with the sweep size"
+    )
+    parser.add_argument(
+        "--sizes",
+        help="number of points of the synthetic sweeps, multiples of 10",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+    )
+    parser.add_argument(
+        "--repeat",
+        help="number of repetitions, the best is kept",
+        type=int,
+        default=3,
+    )
+    parser.add_argument(
+        "--workers",
+        help="number of workers running the sweep",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+    )
+    parser.add_argument(
+        "--output",
+        help="write the timings to this JSON file",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--compare",
+        help="a JSON file of earlier timings to compare against",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--tolerance",
+        help="slowdown ratio reported as a regression by --compare",
+        type=float,
+        default=1.5,
+    )
+    args = parser.parse_args()
+
+    results = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "workers": args.workers,
+        "repeat": args.repeat,
+        "timings": {},
+    }
+    for size in args.sizes:
+        print(f"benchmarking {size} points", file=sys.stderr)
+        results["timings"][str(size)] = benchmark(size, args.repeat, args.workers)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"regressions: {', '.join(regressions)}", file=sys.stderr)
+            exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,53 @@
 import os as _os
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Set
 import sys
 
 data_folder = _os.path.join(_os.getcwd(), ".data")
 python_interpreter = sys.executable
 memory_requirement = 1024
+memory_admission = False
 euler_email = False
 euler_number_of_cores = 1
+threads_per_job = None
+cpu_affinity = False
 euler_wall_time = {}
 script_name = "main.py"
 concurrent_jobs = _os.cpu_count()
-
-
-_arguments_list: List[Tuple] = []
-_hash_to_args: Dict = {}
+result_store = "files"
+compression = None
+compression_level = None
+tasks_per_job = 1
+longest_first = True
+queue_lease_time = 300
+remote_shell = ["ssh", "{host}", "{command}"]
+ssh_multiplexing = True
+ssh_control_persist = 600
+remote_concurrent_jobs: Dict[str, int] = {}
+prefetch_workers = 0
+prefetch_window = None
+prefetch_ordered = True
+prefetch_processes = False
+profile = False
+compress_logs = False
+
+
+from .grid import Grid
+
+_grid = Grid()
+_arguments_list = _grid
+_hash_to_args = _grid.by_hash
 
 from dataclasses import dataclass
 from . import initialize
+from . import ledger
+from . import compress
+from . import store
+from . import arrays
+from . import gather
 from . import post_processing
+from . import map_reduce
+from . import stats
+from . import logs
 from .simulate import _get_unsimulated_args
 from .post_processing import _get_simulated_args
 from .command_line import main
@@ -39,14 +69,9 @@ def data_path(filename: str):
     return _os.path.join(data_folder, filename + ".data")
 
 
-def _get_simulated_arg_hashes():
-    hashes = []
-    files = _os.listdir(data_folder)
-    for file in files:
-        basename = _os.path.basename(file)
-        if basename.endswith(".data"):
-            hashes.append(basename.split('.')[0])
-    return hashes
+def _get_simulated_arg_hashes() -> Set[str]:
+    """return the set of finished simulation hashes from the completion ledger"""
+    return ledger.completed()
 
 
 def _data_folder_exist():
@@ -58,22 +83,7 @@ def arg(name: str, list_of_args: List):
     """
     a decorator function which adds new arguments to simset
     """
-    global _arguments_list
-    global _hash_to_args
-    _hash_to_args = {}
-    if len(_arguments_list) > 0:
-        temp = []
-        for old_args in _arguments_list:  # type: ignore
-            for new_arg in list_of_args:
-                arg_tuple = ((name, *old_args[0]), (new_arg, *old_args[1]))
-                temp.append(arg_tuple)
-                _hash_to_args[hash_to_filename(arg_tuple)] = arg_tuple
-        _arguments_list = temp
-    else:
-        for new_arg in list_of_args:
-            arg_tuple = ((name,), (new_arg,))
-            _arguments_list.append(arg_tuple)
-            _hash_to_args[hash_to_filename(arg_tuple)] = arg_tuple
+    _grid.add_axis(name, list_of_args)
 
     def decorator(func):
         def inner(*args, **kwargs):
@@ -0,0 +1,60 @@
+import logging
+from typing import Optional
+import simset
+
+logger = logging.getLogger(__name__)
+
+
+def available_memory() -> Optional[float]:
+    """return the available system memory in MB, None if unknown"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def task_memory_requirement() -> float:
+    """
+    the memory in MB to reserve per simulation, the larger of
+    simset.memory_requirement and the largest peak RSS recorded for the
+    finished simulations. The peak RSS is only recorded for simulations
+    that ran first in their process, so later simulations of pool, chunk
+    and fork runs do not inherit the peak of an earlier one.
+    """
+    requirement = float(simset.memory_requirement)
+    for record in simset.ledger.records().values():
+        requirement = max(requirement, record.get("max_rss", 0))
+    return requirement
+
+
+class MemoryGate:
+    """
+    Admit new simulations only while the system memory allows it.
+
+    A simulation is admitted if the requirements of all running simulations
+    plus the new one fit in the memory that was available when the gate was
+    created, and the memory available right now covers the new simulation.
+    A simulation is always admitted when nothing else is running.
+    """
+
+    def __init__(self, requirement: Optional[float] = None):
+        if requirement is None:
+            requirement = task_memory_requirement()
+        self.requirement = requirement
+        self.budget = available_memory() if simset.memory_admission else None
+        if self.budget is not None:
+            logger.debug(
+                f"admitting simulations of {self.requirement:.0f} MB within {self.budget:.0f} MB"
+            )
+
+    def admit(self, running: int) -> bool:
+        if self.budget is None or running == 0:
+            return True
+        if (running + 1) * self.requirement > self.budget:
+            return False
+        available = available_memory()
+        return available is None or available >= self.requirement
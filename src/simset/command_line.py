@@ -1,9 +1,20 @@
-from typing import Callable
-from simset.initialize import init, clean, info, info_unsimulated, out, error
+from typing import Callable, Optional
+from simset.initialize import (
+    init,
+    clean,
+    info,
+    info_unsimulated,
+    info_stats,
+    out,
+    error,
+    compress_logs,
+)
 from simset.parser import _parse_arguments, simulate_process_parser
-from simset.simulate import simulate, simulate_setup
-from simset.post_processing import post_processing
+from simset.simulate import simulate, simulate_chunk, simulate_setup
+from simset import threads
+import simset
 import logging
+import os
 
 # Set logging level
 logger = logging.getLogger(__name__)
@@ -29,6 +40,23 @@ def main():
         clean(path=args.path, force=args.force)
         exit(0)
 
+    if args.action == 'reindex':
+        simset.data_folder = os.path.join(args.path, ".data")
+        simset._data_folder_exist()
+        number_of_results = simset.ledger.reindex(args.manifest)
+        logger.info(f"indexed {number_of_results} simulation results")
+        exit(0)
+
+    if args.action == 'missing':
+        if args.manifest is None:
+            logger.info("missing requires the remote completion ledger --manifest")
+            exit(1)
+        simset.data_folder = os.path.join(args.path, ".data")
+        simset._data_folder_exist()
+        for filename in simset.ledger.missing(args.manifest):
+            print(filename)
+        exit(0)
+
     # if args.action == 'copy':
     #     copy(src=args.path, dest=args.path)
     #     exit(0)
@@ -42,6 +70,9 @@ def command_line_simulate_process(
     process_function: Callable,
     save: Callable,
     load: Callable,
+    map_function: Optional[Callable] = None,
+    reduce_function: Optional[Callable] = None,
+    with_args: bool = False,
 ):
     """
     The simulate or process command line function
@@ -52,6 +83,16 @@ def command_line_simulate_process(
         the simulation function to which each argument combination should be passed in simulation.
     process_function: (res1, ...)
         the function which will process the result
+    map_function: (res) -> value
+        if given together with reduce_function, process maps each result in
+        parallel, reduces the values and passes the aggregate to
+        process_function instead, see simset.map_reduce.
+    reduce_function: (value, value) -> value
+        the associative function reducing the mapped values.
+    with_args: `bool`
+        pass process_function Item(args, result) pairs, with the arguments
+        of each result by name, instead of the bare results, as does the
+        process --with-args option.
     """
     args = simulate_process_parser()
     if args.verbose:
@@ -59,27 +100,95 @@ def command_line_simulate_process(
     else:
         logging.basicConfig(level=logging.INFO, format="")
 
+    # the modules of the other actions are imported by their branch, so
+    # that executing a simulation does not pay for importing them
     if args.action == 'process':
-        post_processing(process_function, load)
+        from simset.post_processing import post_processing, parse_where
+
+        where = parse_where(args.where)
+        if map_function is not None and reduce_function is not None:
+            from simset.map_reduce import map_reduce
+
+            process_function(
+                map_reduce(
+                    map_function, reduce_function, load, fresh=args.fresh, where=where
+                )
+            )
+        else:
+            post_processing(
+                process_function,
+                load,
+                where=where,
+                with_args=with_args or args.with_args,
+            )
+        exit(0)
+    elif args.action == 'gather':
+        from simset.gather import gather
+
+        number_of_results = gather(load)
+        logger.info(f"gathered {number_of_results} new results")
         exit(0)
     elif args.action == 'simulate':
-        if args.command == "execute":
-            simulate(simulate_function, args.index, save)
+        if getattr(args, "profile", False):
+            simset.profile = True
+        if args.command == "execute" and args.slot is not None:
+            threads.pin(args.slot - 1, threads.slot_threads() or 1)
+        if args.command == "execute" and args.chunk is not None:
+            if args.of is None:
+                logger.info("--chunk requires the total number of chunks --of")
+                exit(1)
+            simulate_chunk(simulate_function, args.chunk, args.of, save, args.backend)
+        elif args.command == "execute":
+            simulate(simulate_function, args.index, save, args.backend)
         elif args.command == "setup":
             simulate_setup(simulate_function, args)
+        elif args.command == "run":
+            from simset.pool import run
+
+            run(simulate_function, save, args.workers, args.chunk_size, args.fork)
+        elif args.command == "work":
+            from simset import work_queue
+
+            if args.reset:
+                work_queue.reset()
+            work_queue.work(simulate_function, save, args.lease)
+        elif args.command == "dispatch":
+            from simset.dispatch import dispatch
+
+            failed, unassigned = dispatch(args.host)
+            if failed or unassigned:
+                exit(1)
         else:
             logger.info("No suitable command was found")
             exit(1)
         exit(0)
+    elif args.action == 'profile':
+        from simset.post_processing import parse_where
+        from simset.profiling import merge as merge_profiles
+
+        stats = merge_profiles(args.output, where=parse_where(args.where))
+        stats.sort_stats("cumulative").print_stats(args.lines)
+        exit(0)
+    elif args.action == 'trace':
+        from simset.trace import export as export_trace
+
+        number_of_events = export_trace(args.output)
+        logger.info(f"wrote {number_of_events} events to {args.output}")
+        exit(0)
+    elif args.action in ['output', 'error'] and args.compress:
+        compress_logs(args.backend)
+        exit(0)
     elif args.action == 'output':
-        out(args.index)
+        out(args.index, args.backend, args.tail, args.grep, args.hash)
         exit(0)
     elif args.action == 'error':
-        error(args.index)
+        error(args.index, args.backend, args.tail, args.grep, args.failed, args.hash)
         exit(0)
     elif args.action == 'info':
         if args.command == "unsimulated":
             info_unsimulated()
+        elif args.command == "stats":
+            info_stats()
         else:
             info()
         exit(0)
@@ -0,0 +1,110 @@
+import bz2
+import contextlib
+import lzma
+import os
+import struct
+import tempfile
+import zlib
+from typing import Iterator, Optional
+import simset
+
+_magic = b"SIMSETCZ"
+# magic, codec
+_header = struct.Struct("<8sB")
+_block_size = 1 << 20
+# the folder of the data folder holding decompressed results while they are
+# loaded, rather than the data folder itself whose mtime the ledger watches
+_temporary_folder = "tmp"
+
+_codecs = {"zlib": 1, "lzma": 2, "bz2": 3}
+_names = {number: name for name, number in _codecs.items()}
+
+
+def codec() -> Optional[str]:
+    """the configured codec, simset.compression, None if results are stored as is"""
+    if simset.compression is None:
+        return None
+    if simset.compression not in _codecs:
+        raise Exception(
+            f"unknown compression: {simset.compression}, choose one of {list(_codecs)}"
+        )
+    return simset.compression
+
+
+def _compressor(name: str, level: Optional[int]):
+    if name == "zlib":
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+    if name == "lzma":
+        return lzma.LZMACompressor(preset=level)
+    return bz2.BZ2Compressor(9 if level is None else level)
+
+
+def _decompressor(name: str):
+    if name == "zlib":
+        return zlib.decompressobj()
+    if name == "lzma":
+        return lzma.LZMADecompressor()
+    return bz2.BZ2Decompressor()
+
+
+def compress_file(filename: str):
+    """
+    compress a saved result in place with simset.compression at
+    simset.compression_level, behind a header naming the codec.
+    """
+    name = codec()
+    if name is None:
+        return
+    compressor = _compressor(name, simset.compression_level)
+    temporary_filename = f"{filename}.{os.getpid()}.z"
+    with open(filename, "rb") as source, open(temporary_filename, "wb") as target:
+        target.write(_header.pack(_magic, _codecs[name]))
+        for block in iter(lambda: source.read(_block_size), b""):
+            target.write(compressor.compress(block))
+        target.write(compressor.flush())
+    os.replace(temporary_filename, filename)
+
+
+def compressed_codec(filename: str, offset: int = 0) -> Optional[str]:
+    """the codec a result stored at offset in filename was compressed with, if any"""
+    with open(filename, "rb") as f:
+        f.seek(offset)
+        header = f.read(_header.size)
+    if len(header) < _header.size:
+        return None
+    magic, number = _header.unpack(header)
+    if magic != _magic:
+        return None
+    return _names.get(number)
+
+
+@contextlib.contextmanager
+def decompressed(
+    filename: str, offset: int = 0, length: Optional[int] = None
+) -> Iterator[str]:
+    """
+    a temporary file holding the decompressed result stored at offset,
+    within the data folder as the system temporary folder may be too small
+    """
+    name = compressed_codec(filename, offset)
+    if name is None:
+        raise Exception(f"{filename} does not hold a compressed result at {offset}")
+    decompressor = _decompressor(name)
+    folder = os.path.join(simset.data_folder, _temporary_folder)
+    os.makedirs(folder, exist_ok=True)
+    fd, temporary_filename = tempfile.mkstemp(prefix="simset-", dir=folder)
+    try:
+        with open(filename, "rb") as source, os.fdopen(fd, "wb") as target:
+            source.seek(offset + _header.size)
+            remaining = None if length is None else length - _header.size
+            while remaining is None or remaining > 0:
+                size = _block_size if remaining is None else min(_block_size, remaining)
+                block = source.read(size)
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                target.write(decompressor.decompress(block))
+        yield temporary_filename
+    finally:
+        os.remove(temporary_filename)
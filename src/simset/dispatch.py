@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import simset
+from .simulate import _ssh_options
+
+logger = logging.getLogger(__name__)
+
+# exit status of ssh itself when the connection fails
+_connection_failure = 255
+
+
+class Dispatcher:
+    """
+    Fan tasks out over several hosts concurrently.
+
+    Each host runs at most its concurrency limit of tasks at a time. A host
+    whose remote shell fails to connect is dropped and its task is handed
+    to the remaining hosts.
+
+    Parameters
+    ----------
+    hosts: `dict`
+        maps each host to its maximum number of concurrent tasks.
+    command: (index) -> str
+        the shell command executing a task on a host.
+    shell: `list`
+        argument template of the remote shell where {host} and {command}
+        are substituted, defaults to simset.remote_shell sharing one ssh
+        connection per host, see simset.ssh_multiplexing.
+    """
+
+    def __init__(
+        self,
+        hosts: Dict[str, int],
+        command: Callable[[int], str],
+        shell: Optional[List[str]] = None,
+    ):
+        self.hosts = dict(hosts)
+        self.command = command
+        if shell is None:
+            shell = simset.remote_shell
+            if shell[0] == "ssh":
+                # every task reuses the connection of its host
+                shell = [shell[0], *_ssh_options(), *shell[1:]]
+        self.shell = shell
+        self.failed_hosts: List[str] = []
+        self.failed_tasks: List[int] = []
+        self.finished_tasks: List[int] = []
+
+    def _argv(self, host: str, index: int) -> List[str]:
+        command = self.command(index)
+        return [item.format(host=host, command=command) for item in self.shell]
+
+    async def _slot(self, host: str, queue: asyncio.Queue):
+        while host not in self.failed_hosts:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            process = await asyncio.create_subprocess_exec(*self._argv(host, index))
+            returncode = await process.wait()
+            if returncode == _connection_failure:
+                if host not in self.failed_hosts:
+                    logger.info(f"host {host} failed, re-assigning its tasks")
+                    self.failed_hosts.append(host)
+                queue.put_nowait(index)
+            elif returncode != 0:
+                logger.info(f"simulation {index} failed on {host}")
+                self.failed_tasks.append(index)
+            else:
+                logger.debug(f"simulation {index} finished on {host}")
+                self.finished_tasks.append(index)
+
+    async def _dispatch(self, indices: Iterable[int]):
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in indices:
+            queue.put_nowait(index)
+        # tasks put back by a failed host after the other slots ran out of
+        # work are picked up by another round on the remaining hosts.
+        while not queue.empty():
+            live_hosts = [host for host in self.hosts if host not in self.failed_hosts]
+            if not live_hosts:
+                break
+            await asyncio.gather(
+                *[
+                    self._slot(host, queue)
+                    for host in live_hosts
+                    for _ in range(self.hosts[host])
+                ]
+            )
+        unassigned = []
+        while not queue.empty():
+            unassigned.append(queue.get_nowait())
+        return unassigned
+
+    def run(self, indices: Iterable[int]) -> List[int]:
+        """
+        dispatch the task indices and return the indices that could not be
+        assigned because every host failed.
+        """
+        return asyncio.run(self._dispatch(indices))
+
+
+def _host_concurrency(hosts: List[str]) -> Dict[str, int]:
+    return {
+        host: simset.remote_concurrent_jobs.get(host, simset.concurrent_jobs)
+        for host in hosts
+    }
+
+
+def _execute_command(index: int) -> str:
+    folder = os.path.basename(os.getcwd())
+    return " ".join(
+        [
+            f"cd {folder};",
+            f"{simset.python_interpreter}",
+            f"{simset.script_name}",
+            "simulate",
+            "execute",
+            "-i",
+            f"{index}",
+            "--backend",
+            "remote",
+            "1>",
+            os.path.join("remote", "log", f"{index}.out"),
+            "2>",
+            os.path.join("remote", "log", f"{index}.err"),
+        ]
+    )
+
+
+def dispatch(hosts: List[str]) -> Tuple[List[int], List[int]]:
+    """
+    Execute all tasks of the current task table across several hosts.
+
+    The working directory is expected to already be uploaded to every host.
+
+    Returns
+    -------
+    the indices of failed tasks and of tasks that were never run.
+    """
+    number_of_simulations = simset.simulate._number_of_tasks()
+    dispatcher = Dispatcher(_host_concurrency(hosts), _execute_command)
+    unassigned = dispatcher.run(range(1, number_of_simulations + 1))
+    logger.info(
+        f"{len(dispatcher.finished_tasks)} simulations finished, {len(dispatcher.failed_tasks)} failed"
+    )
+    if dispatcher.failed_hosts:
+        logger.info(f"failed hosts: {dispatcher.failed_hosts}")
+    if unassigned:
+        logger.info(f"{len(unassigned)} simulations could not be assigned to any host")
+    return dispatcher.failed_tasks, unassigned
@@ -0,0 +1,402 @@
+import logging
+import mmap
+import numbers
+import os
+import pickle
+import struct
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import simset
+
+logger = logging.getLogger(__name__)
+
+_gather_folder = "gather"
+_gathered_name = "columns.bin"
+# the length of the pickled record which follows
+_record_header = struct.Struct("<Q")
+# the number of results gathered into one segment
+_segment_rows = 1024
+# rows, and the buffers of the arrays within them, start at multiples of
+# this, so that arrays read from the mapped file are aligned
+_alignment = 64
+# the share of superseded rows from which on gather compacts the file
+_compact_ratio = 0.5
+
+# how a result is split into columns and put back together
+_object, _dict, _value = "object", "dict", "value"
+_value_column = "result"
+
+# the segments and rows read by _rows, the mapped file they were read from
+# and its size and mtime
+_cache: Dict[str, Any] = {}
+
+
+def gathered_filename() -> str:
+    "return the absolute path of the consolidated results file"
+    return os.path.join(simset.data_folder, _gather_folder, _gathered_name)
+
+
+def _default_state(cls) -> bool:
+    """whether pickle saves and restores instances of cls through their __dict__"""
+    return (
+        getattr(cls, "__getstate__", None) is getattr(object, "__getstate__", None)
+        and not hasattr(cls, "__setstate__")
+        and cls.__reduce_ex__ is object.__reduce_ex__
+        and cls.__reduce__ is object.__reduce__
+        and not hasattr(cls, "__getnewargs_ex__")
+        and not hasattr(cls, "__getnewargs__")
+    )
+
+
+def _split(result) -> Tuple[Tuple[str, Any], Dict[str, Any]]:
+    """the kind of a result and its fields"""
+    if isinstance(result, dict) and all(isinstance(key, str) for key in result):
+        return (_dict, None), result
+    if (
+        hasattr(result, "__dict__")
+        and not isinstance(result, type)
+        and _default_state(type(result))
+    ):
+        return (_object, type(result)), vars(result)
+    return (_value, None), {_value_column: result}
+
+
+def _join(kind: Tuple[str, Any], fields: Dict[str, Any]):
+    """
+    the inverse of _split. Objects are rebuilt the way pickle rebuilds them,
+    without calling their constructor.
+    """
+    name, cls = kind
+    if name == _dict:
+        return dict(fields)
+    if name == _object:
+        result = cls.__new__(cls)
+        result.__dict__.update(fields)
+        return result
+    return fields[_value_column]
+
+
+def _pack(value) -> bytes:
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return _record_header.pack(len(data)) + data
+
+
+def _read_length(f) -> Optional[int]:
+    header = f.read(_record_header.size)
+    if len(header) < _record_header.size:
+        return None
+    return _record_header.unpack(header)[0]
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _alignment) * _alignment
+
+
+def _row_layout(
+    pickle_length: int, buffer_lengths: Tuple[int, ...]
+) -> Tuple[List[int], int]:
+    """the offsets of the array buffers of a row within it, and its size"""
+    offsets = []
+    end = pickle_length
+    for length in buffer_lengths:
+        offsets.append(_aligned(end))
+        end = offsets[-1] + length
+    return offsets, _aligned(end)
+
+
+def _dump_row(fields: Dict[str, Any]) -> Tuple[bytes, List[memoryview]]:
+    """
+    the pickled fields of a result and the buffers of the arrays within
+    them, which pickle leaves out of band
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    data = pickle.dumps(fields, protocol=5, buffer_callback=buffers.append)
+    return data, [buffer.raw() for buffer in buffers]
+
+
+def _row_bytes(data: bytes, buffers: List[memoryview]) -> bytes:
+    offsets, size = _row_layout(len(data), tuple(len(buffer) for buffer in buffers))
+    parts = [data]
+    end = len(data)
+    for offset, buffer in zip(offsets, buffers):
+        parts += [bytes(offset - end), buffer]
+        end = offset + len(buffer)
+    parts.append(bytes(size - end))
+    return b"".join(parts)
+
+
+def _segments() -> Iterator[Dict]:
+    """
+    The complete segments of the consolidated file, oldest first.
+
+    A segment is a header record, holding the kind, hashes, ledger records
+    and argument values of its rows and the layout of every row, followed
+    by the rows, each the pickled result fields and the buffers of the
+    arrays within them. Only the headers are read, each segment is
+    returned with the file offset of every row.
+    """
+    filename = gathered_filename()
+    if not os.path.exists(filename):
+        return
+    with open(filename, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        while True:
+            length = _read_length(f)
+            if length is None or f.tell() + length > size:
+                return
+            segment = pickle.loads(f.read(length))
+            offsets = []
+            end = _aligned(f.tell())
+            for pickle_length, buffer_lengths in segment["rows"]:
+                offsets.append(end)
+                end += _row_layout(pickle_length, buffer_lengths)[1]
+            if end > size:
+                # truncated by an interrupted gather
+                return
+            f.seek(end)
+            segment["offsets"] = offsets
+            yield segment
+
+
+def _rows() -> Dict[str, Tuple[Dict, int]]:
+    """hash -> (segment, row) of the latest gathered copy of every result"""
+    try:
+        stat = os.stat(gathered_filename())
+        version = (stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        version = None
+    if _cache.get("version") != version or "rows" not in _cache:
+        segments = list(_segments())
+        rows = {}
+        for segment in segments:
+            for row, item_hash in enumerate(segment["hashes"]):
+                rows[item_hash] = (segment, row)
+        mapped = None
+        if rows:
+            with open(gathered_filename(), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _cache.update(version=version, segments=segments, rows=rows, mapped=mapped)
+    return _cache["rows"]
+
+
+def _raw_row(segment: Dict, row: int) -> memoryview:
+    start = segment["offsets"][row]
+    size = _row_layout(*segment["rows"][row])[1]
+    return memoryview(_cache["mapped"])[start : start + size]
+
+
+def _fields(segment: Dict, row: int) -> Dict[str, Any]:
+    """
+    the fields of a gathered result, whose arrays are read-only views of the
+    mapped file, like those of simset.arrays.load, rather than read into
+    memory
+    """
+    pickle_length, buffer_lengths = segment["rows"][row]
+    offsets, _ = _row_layout(pickle_length, buffer_lengths)
+    raw = _raw_row(segment, row)
+    return pickle.loads(
+        raw[:pickle_length],
+        buffers=[
+            raw[offset : offset + length]
+            for offset, length in zip(offsets, buffer_lengths)
+        ],
+    )
+
+
+def _write_segment(
+    f,
+    kind,
+    item_hashes: List[str],
+    records: List[Dict],
+    args: Dict[str, List],
+    layouts: List[Tuple[int, Tuple[int, ...]]],
+    rows: Iterator[bytes],
+):
+    """write a segment, one row at a time"""
+    f.write(
+        _pack(
+            {
+                "kind": kind,
+                "hashes": item_hashes,
+                "records": records,
+                "args": args,
+                "rows": layouts,
+            }
+        )
+    )
+    f.write(bytes(_aligned(f.tell()) - f.tell()))
+    for row in rows:
+        f.write(row)
+
+
+def _arguments(item_hashes: List[str]) -> Dict[str, List]:
+    arguments = [simset._hash_to_args[item_hash] for item_hash in item_hashes]
+    argument_names = list(arguments[0][0][::-1]) if arguments else []
+    return {
+        name: [args[1][::-1][position] for args in arguments]
+        for position, name in enumerate(argument_names)
+    }
+
+
+def _compact(rows: Dict[str, Tuple[Dict, int]]):
+    """rewrite the consolidated file without its superseded rows"""
+    filename = gathered_filename()
+    temporary_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary_filename, "wb") as f:
+        for segment in _cache["segments"]:
+            live = [
+                row
+                for row, item_hash in enumerate(segment["hashes"])
+                if rows[item_hash][0] is segment and rows[item_hash][1] == row
+            ]
+            if not live:
+                continue
+            _write_segment(
+                f,
+                segment["kind"],
+                [segment["hashes"][row] for row in live],
+                [segment["records"][row] for row in live],
+                {
+                    name: [values[row] for row in live]
+                    for name, values in segment["args"].items()
+                },
+                [segment["rows"][row] for row in live],
+                (_raw_row(segment, row) for row in live),
+            )
+    os.replace(temporary_filename, filename)
+
+
+def gather(load: Callable) -> int:
+    """
+    Stream the finished results into the consolidated file.
+
+    The file is a sequence of segments, each holding the argument values,
+    as columns, and the result fields of up to _segment_rows results of one
+    kind gathered by one run. The arrays within the results are stored as
+    raw buffers, which reading maps from the file rather than loads.
+    Only results that are new, or were simulated again since, are loaded
+    through the user load function and appended, so repeated gathers are
+    cheap. Once half of the rows are superseded by newer copies the file is
+    compacted.
+
+    Object results are rebuilt like pickle does, see _join.
+
+    Returns
+    -------
+    the number of results added.
+    """
+    os.makedirs(os.path.dirname(gathered_filename()), exist_ok=True)
+    # the ledger may reindex itself here, before the consolidated file is written
+    records = simset.ledger.records()
+    ledger_mtime = _mtime(simset.ledger.ledger_filename())
+    gathered = {
+        item_hash: segment["records"][row]
+        for item_hash, (segment, row) in _rows().items()
+    }
+    new_hashes = [
+        item_hash
+        for item_hash in simset._get_simulated_args()
+        if gathered.get(item_hash) != records.get(item_hash, {})
+    ]
+    logger.info(f"gathering {len(new_hashes)} of {len(records)} results")
+
+    with open(gathered_filename(), "ab") as f:
+        # a segment of results at a time, so that they are never all in memory
+        for start in range(0, len(new_hashes), _segment_rows):
+            groups: Dict[Tuple[str, Any], Tuple[List[str], List]] = {}
+            for item_hash in new_hashes[start : start + _segment_rows]:
+                kind, fields = _split(simset.store.load_result(item_hash, load))
+                item_hashes, dumped = groups.setdefault(kind, ([], []))
+                item_hashes.append(item_hash)
+                dumped.append(_dump_row(fields))
+            for kind, (item_hashes, dumped) in groups.items():
+                _write_segment(
+                    f,
+                    kind,
+                    item_hashes,
+                    [records.get(item_hash, {}) for item_hash in item_hashes],
+                    _arguments(item_hashes),
+                    [
+                        (len(data), tuple(len(buffer) for buffer in buffers))
+                        for data, buffers in dumped
+                    ],
+                    (_row_bytes(data, buffers) for data, buffers in dumped),
+                )
+
+    rows = _rows()
+    total = sum(len(segment["hashes"]) for segment in _cache["segments"])
+    if total - len(rows) >= _compact_ratio * total > 0:
+        logger.info(f"compacting {total - len(rows)} superseded rows")
+        _compact(rows)
+    # up to date with the ledger as it was read, not as it may be by now
+    os.utime(gathered_filename(), ns=(ledger_mtime, ledger_mtime))
+    return len(new_hashes)
+
+
+def _mtime(filename: str) -> int:
+    try:
+        return os.stat(filename).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def up_to_date(item_hashes: List[str]) -> bool:
+    """
+    whether the consolidated file holds the results of item_hashes as they
+    are now, which holds if they were all gathered and no simulation has
+    finished since the last gather.
+    """
+    if not os.path.exists(gathered_filename()):
+        return False
+    simset.ledger.completed()
+    if _mtime(gathered_filename()) < _mtime(simset.ledger.ledger_filename()):
+        return False
+    rows = _rows()
+    return all(item_hash in rows for item_hash in item_hashes)
+
+
+def results(item_hashes: List[str]) -> Iterator:
+    """the gathered results of item_hashes, in order, read one at a time"""
+    rows = _rows()
+    for item_hash in item_hashes:
+        segment, row = rows[item_hash]
+        yield _join(segment["kind"], _fields(segment, row))
+
+
+def _stacked(values: List):
+    try:
+        import numpy
+    except ImportError:
+        return values
+    if not all(isinstance(value, (numbers.Number, numpy.ndarray)) for value in values):
+        return values
+    try:
+        column = numpy.stack([numpy.asarray(value) for value in values])
+    except ValueError:
+        # arrays of differing shapes
+        return values
+    return values if column.dtype.hasobject else column
+
+
+def table(stack: bool = False) -> Dict[str, Any]:
+    """
+    The gathered results as columns.
+
+    Returns a dict from column name to a list with one value per result: the
+    result hash under "hash", the value of every argument under its name and
+    every result field under its name, None where a result lacks the field.
+    Fields of results which are not objects or dicts are under "result".
+
+    With stack set, numeric columns and columns of equally shaped arrays
+    are returned as one NumPy array each.
+    """
+    rows = _rows()
+    columns: Dict[str, Any] = {"hash": list(rows)}
+    for position, (segment, row) in enumerate(rows.values()):
+        fields = {name: values[row] for name, values in segment["args"].items()}
+        fields.update(_fields(segment, row))
+        for name, value in fields.items():
+            columns.setdefault(name, [None] * len(rows))[position] = value
+    for name, column in columns.items():
+        if name != "hash" and stack:
+            columns[name] = _stacked(column)
+    return columns
@@ -0,0 +1,154 @@
+import itertools
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import simset
+
+
+class Grid(Sequence):
+    """
+    A lazy cartesian product over all axes registered by simset.arg.
+
+    The grid is a mixed-radix number where the first registered axis is the
+    most significant digit and the last registered axis varies the fastest.
+    Each point is represented as the argument tuple
+
+    ((name_k, ..., name_1), (value_k, ..., value_1))
+
+    which is exactly the tuple that is hashed into the data filenames.
+    """
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._values: List[List[Any]] = []
+        self._hash_index: Optional[Dict[bytes, int]] = None
+        self.by_hash = HashView(self)
+
+    def add_axis(self, name: str, values):
+        """register a new axis, invalidating any cached hash lookup"""
+        self._names.append(name)
+        self._values.append(list(values))
+        self._hash_index = None
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """the axis names in registration order"""
+        return tuple(self._names)
+
+    @property
+    def values(self) -> Tuple[List[Any], ...]:
+        """the axis values in registration order"""
+        return tuple(self._values)
+
+    def __len__(self) -> int:
+        if not self._values:
+            return 0
+        size = 1
+        for values in self._values:
+            size *= len(values)
+        return size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(f"grid index {index} out of range for size {size}")
+        values = []
+        for axis_values in reversed(self._values):
+            index, digit = divmod(index, len(axis_values))
+            values.append(axis_values[digit])
+        return (tuple(reversed(self._names)), tuple(values))
+
+    def __iter__(self) -> Iterator[Tuple]:
+        if not self._values:
+            return
+        names = tuple(reversed(self._names))
+        for point in itertools.product(*self._values):
+            yield (names, point[::-1])
+
+    def hashes(self) -> Iterator[str]:
+        """stream the hash of every point in index order"""
+        for arg_tuple in self:
+            yield simset.hash_to_filename(arg_tuple)
+
+    def items(self) -> Iterator[Tuple[str, Tuple]]:
+        """stream (hash, argument tuple) pairs in index order"""
+        for arg_tuple in self:
+            yield simset.hash_to_filename(arg_tuple), arg_tuple
+
+    def select(self, where: Dict[str, Any]) -> Iterator[Tuple[str, Tuple]]:
+        """
+        stream (hash, argument tuple) pairs in index order of the points
+        whose arguments match where, see matches. Only matching points are
+        hashed.
+        """
+        for name in where:
+            if name not in self._names:
+                raise Exception(f"unknown argument: {name}")
+        axes = [
+            (
+                [value for value in values if matches(where[name], value)]
+                if name in where
+                else values
+            )
+            for name, values in zip(self._names, self._values)
+        ]
+        if not axes:
+            return
+        names = tuple(reversed(self._names))
+        for point in itertools.product(*axes):
+            arg_tuple = (names, point[::-1])
+            yield simset.hash_to_filename(arg_tuple), arg_tuple
+
+    def index_of(self, item_hash: str) -> int:
+        """
+        return the index of a hash.
+
+        The first call hashes the full grid once and keeps a compact
+        digest to index table for subsequent lookups.
+        """
+        if self._hash_index is None:
+            self._hash_index = {
+                bytes.fromhex(h): index for index, h in enumerate(self.hashes())
+            }
+        try:
+            return self._hash_index[bytes.fromhex(item_hash)]
+        except ValueError:
+            raise KeyError(item_hash)
+
+
+def matches(condition, value) -> bool:
+    """
+    whether an argument value satisfies a condition, which is either a
+    predicate, a list, tuple or set of accepted values, or a single value.
+    """
+    if callable(condition):
+        return bool(condition(value))
+    if isinstance(condition, (list, tuple, set, frozenset)):
+        return value in condition
+    return value == condition
+
+
+class HashView(Mapping):
+    """
+    A read only hash -> argument tuple mapping backed by a Grid.
+
+    Iteration streams the hashes without materializing the product.
+    """
+
+    def __init__(self, grid: Grid):
+        self._grid = grid
+
+    def __getitem__(self, item_hash: str) -> Tuple:
+        return self._grid[self._grid.index_of(item_hash)]
+
+    def __iter__(self) -> Iterator[str]:
+        return self._grid.hashes()
+
+    def __len__(self) -> int:
+        return len(self._grid)
+
+    def items(self):
+        return self._grid.items()
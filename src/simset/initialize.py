@@ -1,9 +1,7 @@
 import os
 import logging
-from typing import List
-import jinja2
+from typing import List, Optional
 import simset
-from itertools import chain
 import simset
 
 logger = logging.getLogger(__name__)
@@ -28,6 +26,8 @@ def init(path: str = os.getcwd(), force: bool = False):
     if os.path.exists(filename) and not force:
         logger.info(f"{_filename} file already exsists. use --force to overwrite")
         exit(1)
+    import jinja2
+
     _env = jinja2.Environment(
         loader=jinja2.PackageLoader("simset", package_path="templates"),
         autoescape=jinja2.select_autoescape(),
@@ -106,7 +106,17 @@ def clean(path: str = os.getcwd(), force: bool = False):
             os.remove(filename)
 
     # Remove execution folders
-    for folder in ['local', 'condor', 'euler', 'parallel', 'remote', 'bash_scripts']:
+    for folder in [
+        'local',
+        'condor',
+        'euler',
+        'parallel',
+        'remote',
+        'pool',
+        'queue',
+        'profile',
+        'bash_scripts',
+    ]:
         _remove_folder_if_sure(os.path.join(path, folder))
 
     # Remove data files
@@ -128,90 +138,84 @@ def copy(src_path: str, dest_path: str):
     raise NotImplementedError
 
 
-def _all_files(path: str):
-    res = [""]
-    if os.path.exists(path):
-        for root, dirs, files in os.walk(path, topdown=True):
-            for file in files:
-                res.append(os.path.join(root, file))
-            for dir_name in dirs:
-                folder_path = os.path.join(root, dir_name)
-                res = res + _all_files(folder_path)
-    return res
-
-
-def _out_files():
-    log_folders = ["local/out", "condor/out", "euler/out"]
-
-    def out_files(filename: str):
-        if filename.endswith(".out"):
-            return True
-        return False
-
-    all_files = [_all_files(folder) for folder in log_folders]
-    return list(filter(out_files, chain(*all_files)))
-
-
-def _err_files():
-    err_folders = ["local/err", "condor/err", "euler/err"]
-
-    def out_files(filename: str):
-        if filename.endswith(".err"):
-            return True
-        return False
-
-    all_files = [_all_files(folder) for folder in err_folders]
-    return list(filter(out_files, chain(*all_files)))
-
-
-def out(index: int = -1):
-    """Display simulation logs"""
-
-    if index >= 0:
-        # retrieve a specific log
-        def file_with_index(filename: str):
-            if filename.endswith(f"{index}.out"):
-                return True
-            return False
-
-        candidates = list(filter(file_with_index, _out_files()))
-        if len(candidates) == 1:
-            with open(candidates[0], 'r') as f:
-                print(f.read())
+def _show_logs(
+    kind: str,
+    index: int = -1,
+    backend: Optional[str] = None,
+    tail: Optional[int] = None,
+    grep: Optional[str] = None,
+    item_hash: Optional[str] = None,
+):
+    """
+    display the log of a simulation, by hash or task index, the lines
+    matching grep or a summary
+    """
+    if grep is not None:
+        for name, task_index, number, line in simset.logs.grep(kind, grep, backend):
+            print(f"{name}/{task_index}:{number}: {line}")
+    elif item_hash is not None or index >= 0:
+        if item_hash is not None:
+            paths = simset.logs.find_hash(kind, item_hash, backend)
         else:
-            logger.info("Multiple candidates for index: {index}\nNamely: {candidates}")
+            paths = simset.logs.find(kind, index, backend)
+        if not paths:
+            logger.info(f"No {kind} log for {item_hash or f'index: {index}'}")
+        for path in paths:
+            text = simset.logs.read(path)
+            if len(paths) > 1:
+                print(f"==> {path} <==")
+            print(text if tail is None else simset.logs.tail(text, tail))
     else:
-        number_of_out_files = len(_out_files())
-        logger.info(f"{number_of_out_files} number of stdout files.")
-        if number_of_out_files > 0:
+        summary = simset.logs.summary(kind, backend)
+        if not summary:
+            logger.info(f"0 number of {kind} files.")
+            return
+        for name, counts in summary.items():
             logger.info(
-                f"\n\nTo display a specific output file use the index [0-{number_of_out_files-1}] option"
+                f"{name}: {counts['logs']} {kind} files, {counts['compressed']} compressed, "
+                f"{counts['empty']} empty, {_format_value(counts['size'], 'B')}"
             )
+        logger.info(f"\n\nTo display a specific {kind} file use the task index option")
 
 
-def error(index: int = -1):
-    """Display simulation errors"""
+def out(
+    index: int = -1,
+    backend: Optional[str] = None,
+    tail: Optional[int] = None,
+    grep: Optional[str] = None,
+    item_hash: Optional[str] = None,
+):
+    """Display simulation logs"""
+    _show_logs("out", index, backend, tail, grep, item_hash)
+
+
+def error(
+    index: int = -1,
+    backend: Optional[str] = None,
+    tail: Optional[int] = None,
+    grep: Optional[str] = None,
+    failed: bool = False,
+    item_hash: Optional[str] = None,
+):
+    """Display simulation errors, only those of failed simulations if failed is set"""
+    if not failed:
+        _show_logs("err", index, backend, tail, grep, item_hash)
+        return
+    failures = simset.logs.failed(backend)
+    logger.info(f"{len(failures)} failed simulations.")
+    for item_hash, task_index, paths in failures:
+        if not paths:
+            logger.info(f"No error log for {item_hash}")
+        for path in paths:
+            text = simset.logs.read(path)
+            print(f"==> {path} ({item_hash}) <==")
+            print(text if tail is None else simset.logs.tail(text, tail))
 
-    if index >= 0:
-        # retrieve a specific log
-        def file_with_index(filename: str):
-            if filename.endswith(f"{index}.err"):
-                return True
-            return False
 
-        candidates = list(filter(file_with_index, _err_files()))
-        if len(candidates) == 1:
-            with open(candidates[0], 'r') as f:
-                print(f.read())
-        else:
-            logger.info("Multiple candidates for index: {index}\nNamely: {candidates}")
-    else:
-        number_of_error_files = len(_err_files())
-        logger.info(f"{number_of_error_files} number of stderr files.")
-        if number_of_error_files > 0:
-            logger.info(
-                f"To display a specific error use the index [0-{number_of_error_files-1}] option"
-            )
+def compress_logs(backend: Optional[str] = None):
+    """Compress the logs of the finished and failed simulations"""
+    number = simset.logs.compress(backend)
+    logger.info(f"compressed {number} logs")
 
 
 def info():
@@ -221,9 +225,7 @@ def info():
     simset._data_folder_exist()
     simulated = simset._get_simulated_args()
 
-    size = sum(
-        [os.path.getsize(simset.data_path(item_hash)) for item_hash in simulated]
-    )
+    size = sum([simset.store.result_size(item_hash) for item_hash in simulated])
     if size < (1 << 10):
         simulated_size = f"{size} B"
     elif size < (1 << 20):
@@ -248,11 +250,13 @@ def info_unsimulated():
     print parameter configurations of unfinished simulations
     """
     spacing = 10  # number of fixed width for value field
-    unsimulated = simset._get_unsimulated_args()
+    unsimulated = set(simset._get_unsimulated_args())
 
     print("\nunsimulated simulations:")
-    for key in unsimulated:
-        pairs = zip(simset._hash_to_args[key][0], simset._hash_to_args[key][1])
+    for key, args in simset._hash_to_args.items():
+        if key not in unsimulated:
+            continue
+        pairs = zip(args[0], args[1])
         print(
             "...{}: ".format(key[-8:])
             + "\t".join(
@@ -264,3 +268,59 @@ def info_unsimulated():
         )
 
     print()
+
+
+def _format_value(value: float, unit: str) -> str:
+    if unit == "B":
+        for prefix in ["", "k", "M", "G"]:
+            if value < 1024 or prefix == "G":
+                return f"{value:.0f} {prefix}B"
+            value /= 1024
+    return f"{value:.2f} {unit}"
+
+
+def _format_summary(summary, unit: str) -> str:
+    if not summary["count"]:
+        return "-"
+    return "  ".join(
+        f"{key} {_format_value(summary[key], unit)}"
+        for key in ["mean", "p50", "p90", "p99", "max"]
+    )
+
+
+def info_stats(number_of_slowest: int = 5):
+    """
+    print the resources used by the finished simulations, overall, per
+    argument value and for the slowest configurations
+    """
+    simulations = simset.stats.finished()
+    failures = simset.ledger.failures()
+
+    overall = simset.stats.overall(simulations)
+
+    print(f"\n{len(simulations)} finished and {len(failures)} failed simulations\n")
+    for field, summary in overall.items():
+        print(f"{field:>8}: {_format_summary(summary, simset.stats.fields[field])}")
+    max_rss = overall["max_rss"]
+    if max_rss["count"]:
+        print(
+            f"\npeak RSS {max_rss['max']:.0f} MB, simset.memory_requirement is {simset.memory_requirement} MB"
+        )
+
+    print("\nwall time per argument value:")
+    for name, axis in simset.stats.by_axis(simulations).items():
+        for value, summary in axis.items():
+            print(
+                f"{name} = {value}: {summary['count']} runs  {_format_summary(summary, 's')}"
+            )
+
+    print("\nslowest simulations:")
+    for args, record in simset.stats.slowest(simulations, number_of_slowest):
+        arguments = ", ".join(f"{name} = {value}" for name, value in args.items())
+        print(f"{record['time']:.2f} s: {arguments}")
+
+    if failures:
+        print("\nfailed simulations:")
+        for item_hash, record in failures.items():
+            print(f"...{item_hash[-8:]}: {record.get('error', 'unknown error')}")
+    print()
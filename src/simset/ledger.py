@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Set
+import simset
+from . import store
+
+logger = logging.getLogger(__name__)
+
+_ledger_name = "completed.log"
+_failures_name = "failed.log"
+_hash_length = 64
+_hex_digits = b"0123456789abcdef"
+# the info of a record which only says that its result is finished
+_no_info = (b"", b"{}")
+# the info of the record reindex appends for a result gone from the data folder
+_removed = b"null"
+
+
+def ledger_filename() -> str:
+    "return the absolute path of the completion ledger"
+    return os.path.join(simset.data_folder, _ledger_name)
+
+
+def _format(item_hash: str, info: Dict) -> bytes:
+    return f"{item_hash}\t{json.dumps(info, sort_keys=True)}\n".encode()
+
+
+def failures_filename() -> str:
+    "return the absolute path of the log of failed simulations"
+    return os.path.join(simset.data_folder, _failures_name)
+
+
+def _append(filename: str, lines: bytes):
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o660)
+    try:
+        os.write(fd, lines)
+    finally:
+        os.close(fd)
+
+
+def record(item_hash: str, info: Dict = {}):
+    """
+    Append a finished simulation to the ledger.
+
+    Each record is a single line written with one O_APPEND write, so
+    concurrent writers never interleave and a crash can at most leave a
+    truncated last line which readers ignore.
+    """
+    _append(ledger_filename(), _format(item_hash, info))
+
+
+def record_failure(item_hash: str, info: Dict = {}):
+    """append a failed simulation to the log of failures, in the ledger format"""
+    _append(failures_filename(), _format(item_hash, info))
+
+
+def failures() -> Dict[str, Dict]:
+    """
+    return the latest failure record of every simulation which failed and
+    has not finished since
+    """
+    if not os.path.exists(failures_filename()):
+        return {}
+    finished = completed()
+    return {
+        item_hash: info
+        for item_hash, info in _records(failures_filename()).items()
+        if item_hash not in finished
+    }
+
+
+def _is_hash(item_hash: bytes) -> bool:
+    return len(item_hash) == _hash_length and not item_hash.translate(None, _hex_digits)
+
+
+def _parse(filename: str):
+    """
+    (hash, record) of every complete line of a ledger.
+
+    A record truncated by a crash has no newline, so the record appended
+    after it ends up on the same line. Records never contain tabs, which
+    json escapes, so the complete record is the one at the last tab, and
+    the truncated record is kept without its info if its hash survived.
+    """
+    with open(filename, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                # truncated by a crash
+                continue
+            line = line.rstrip(b"\n")
+            tab = line.rfind(b"\t")
+            if tab == _hash_length:
+                item_hash, info = line[:tab], line[tab + 1 :]
+                if _is_hash(item_hash):
+                    yield item_hash.decode(), info
+                continue
+            truncated_hash = line[:_hash_length]
+            if line[_hash_length : _hash_length + 1] == b"\t" and _is_hash(
+                truncated_hash
+            ):
+                yield truncated_hash.decode(), b""
+            item_hash, info = line[tab - _hash_length : tab], line[tab + 1 :]
+            if tab > _hash_length and _is_hash(item_hash):
+                yield item_hash.decode(), info
+
+
+def _latest(filename: str) -> Dict[str, bytes]:
+    """
+    the latest record of every finished simulation of a ledger, where a
+    record without info never replaces one with info, so that the records
+    reindex appends for results it found cannot hide the record appended
+    by the simulation itself.
+    """
+    latest = {}
+    for item_hash, info in _parse(filename):
+        if info in _no_info and latest.get(item_hash, _removed) != _removed:
+            continue
+        latest[item_hash] = info
+    return {item_hash: info for item_hash, info in latest.items() if info != _removed}
+
+
+def _records(filename: str) -> Dict[str, Dict]:
+    result = {}
+    for item_hash, info in _latest(filename).items():
+        try:
+            result[item_hash] = json.loads(info) if info else {}
+        except ValueError:
+            result[item_hash] = {}
+    return result
+
+
+def records() -> Dict[str, Dict]:
+    """return the latest ledger record of every finished simulation"""
+    if not os.path.exists(simset.data_folder):
+        return {}
+    _reindex_if_stale()
+    return _records(ledger_filename())
+
+
+def completed() -> Set[str]:
+    """return the set of finished simulation hashes"""
+    if not os.path.exists(simset.data_folder):
+        return set()
+    _reindex_if_stale()
+    return set(_latest(ledger_filename()))
+
+
+def _results_mtime() -> int:
+    # results copied into the data folder behind the ledger's back, e.g.
+    # by rsync, show up as a data folder or pack index newer than the ledger.
+    return max(os.stat(simset.data_folder).st_mtime_ns, store.newest_index_mtime())
+
+
+def _stale() -> bool:
+    try:
+        ledger_mtime = os.stat(ledger_filename()).st_mtime_ns
+    except FileNotFoundError:
+        return True
+    return _results_mtime() > ledger_mtime
+
+
+def _reindex_if_stale():
+    if _stale():
+        logger.debug("completion ledger is stale, rebuilding it")
+        reindex()
+
+
+def _data_files():
+    with os.scandir(simset.data_folder) as entries:
+        for entry in entries:
+            item_hash, extension = os.path.splitext(entry.name)
+            if extension == ".data" and len(item_hash) == _hash_length:
+                yield item_hash
+    yield from store.packed_hashes()
+
+
+def missing(manifest: str) -> List[str]:
+    """
+    the results listed in manifest, the ledger of another copy of the data
+    folder, which are not finished here, as filenames relative to the data
+    folder.
+    """
+    finished = completed()
+    return [
+        f"{item_hash}.data"
+        for item_hash in _latest(manifest)
+        if item_hash not in finished
+    ]
+
+
+def reindex(manifest: Optional[str] = None) -> int:
+    """
+    Bring the ledger up to date with the result files and packs in the data
+    folder.
+
+    Results without a record get one, taken from manifest, the ledger of the
+    copy of the data folder they came from, if it has one, and results which
+    are gone get a record marking them removed. Like record, reindex only
+    ever appends to the ledger, so it may run while simulations finish.
+
+    Returns
+    -------
+    the number of finished simulations.
+    """
+    filename = ledger_filename()
+    # taken before the scan, so results arriving during it leave the ledger stale
+    scanned = _results_mtime()
+    # read before the scan, a result is saved before its record is appended
+    previous = _latest(filename) if os.path.exists(filename) else {}
+    remote = {} if manifest is None else _latest(manifest)
+    present = set(_data_files())
+    lines = []
+    for item_hash in present:
+        info = remote.get(item_hash, b"{}") or b"{}"
+        if item_hash not in previous or (
+            previous[item_hash] in _no_info and info not in _no_info
+        ):
+            lines.append(item_hash.encode() + b"\t" + info + b"\n")
+    for item_hash in previous.keys() - present:
+        lines.append(item_hash.encode() + b"\t" + _removed + b"\n")
+    _append(filename, b"".join(lines))
+    os.utime(filename, ns=(scanned, scanned))
+    return len(present)
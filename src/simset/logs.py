@@ -0,0 +1,219 @@
+import gzip
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+import simset
+
+# the log folder and file extension of every kind of log
+kinds = {"out": ".out", "err": ".err"}
+_compressed = ".gz"
+
+
+def _backends(backend: Optional[str] = None) -> List[str]:
+    if backend is None:
+        return list(simset.simulate._backends)
+    if backend not in simset.simulate._backends:
+        raise Exception(
+            f"unknown backend {backend}, choose one of {simset.simulate._backends}"
+        )
+    return [backend]
+
+
+def log_filename(
+    kind: str, backend: str, task_index: int, item_hash: Optional[str]
+) -> str:
+    """
+    the path of a log of a task, named after its task index and hash, as
+    task indices are assigned anew by every simulate setup
+    """
+    stem = str(task_index) if item_hash is None else f"{task_index}.{item_hash}"
+    return os.path.join(backend, kind, f"{stem}{kinds[kind]}")
+
+
+def _parse_name(name: str, kind: str) -> Optional[Tuple[int, Optional[str]]]:
+    """
+    the task index and hash of a log file name, None if it is not a task
+    log. The hash is None for logs named after their task index only, as
+    written before logs carried the hash.
+    """
+    if name.endswith(_compressed):
+        name = name[: -len(_compressed)]
+    stem, extension = os.path.splitext(name)
+    if extension != kinds[kind]:
+        return None
+    task_index, _, item_hash = stem.partition(".")
+    if not task_index.isdigit() or not (
+        item_hash == "" or simset.ledger._is_hash(item_hash.encode())
+    ):
+        return None
+    return int(task_index), item_hash or None
+
+
+def index(
+    kind: str, backend: Optional[str] = None
+) -> Dict[Tuple[str, int, Optional[str]], str]:
+    """
+    (backend, task index, hash) -> path of every task log of a kind.
+
+    Every log folder is listed once, without descending into subfolders,
+    and a plain log is preferred over a compressed one of the same task,
+    which it replaced when the task was simulated again.
+    """
+    logs: Dict[Tuple[str, int, Optional[str]], str] = {}
+    for name in _backends(backend):
+        folder = os.path.join(name, kind)
+        try:
+            entries = list(os.scandir(folder))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            parsed = _parse_name(entry.name, kind)
+            if parsed is None or not entry.is_file():
+                continue
+            key = (name, *parsed)
+            if entry.name.endswith(_compressed) and key in logs:
+                continue
+            logs[key] = entry.path
+    return logs
+
+
+def _by_path(logs: Dict) -> List[Tuple[Tuple[str, int, Optional[str]], str]]:
+    return sorted(logs.items(), key=lambda item: item[1])
+
+
+def by_hash(kind: str, backend: Optional[str] = None) -> Dict[str, List[str]]:
+    """hash -> paths of the logs of a kind of every simulation, one per backend"""
+    logs: Dict[str, List[str]] = {}
+    for (_, _, item_hash), path in _by_path(index(kind, backend)):
+        if item_hash is not None:
+            logs.setdefault(item_hash, []).append(path)
+    return logs
+
+
+def find_hash(kind: str, item_hash: str, backend: Optional[str] = None) -> List[str]:
+    """the paths of the logs of a kind of a simulation, one per backend"""
+    return by_hash(kind, backend).get(item_hash, [])
+
+
+def _task_hash(task_index: int) -> Optional[str]:
+    """the hash of the task at an index of the current task table, if any"""
+    try:
+        return simset.simulate._load_task(task_index)[0]
+    except Exception:
+        return None
+
+
+def find(kind: str, task_index: int, backend: Optional[str] = None) -> List[str]:
+    """
+    the paths of the logs of a kind of the task at an index of the current
+    task table, one per backend, or if it has none those named after the
+    task index only. Without a task table, those of every task which had
+    the index.
+    """
+    item_hash = _task_hash(task_index)
+    logs = [
+        (logged_hash, path)
+        for (_, number, logged_hash), path in _by_path(index(kind, backend))
+        if number == task_index
+    ]
+    if item_hash is None:
+        return [path for _, path in logs]
+    paths = [path for logged_hash, path in logs if logged_hash == item_hash]
+    return paths or [path for logged_hash, path in logs if logged_hash is None]
+
+
+def read(path: str) -> str:
+    """the text of a log, compressed or not"""
+    if path.endswith(_compressed):
+        with gzip.open(path, "rt", errors="replace") as f:
+            return f.read()
+    with open(path, "r", errors="replace") as f:
+        return f.read()
+
+
+def tail(text: str, lines: int) -> str:
+    """the last lines of text"""
+    if lines <= 0:
+        return ""
+    return "\n".join(text.splitlines()[-lines:])
+
+
+def grep(
+    kind: str, pattern: str, backend: Optional[str] = None
+) -> Iterator[Tuple[str, int, int, str]]:
+    """
+    (backend, task index, line number, line) of every line of the logs of a
+    kind matching the regular expression pattern, by backend and task index
+    """
+    expression = re.compile(pattern)
+    logs = index(kind, backend)
+    for (name, task_index, _), path in sorted(
+        logs.items(), key=lambda item: (item[0][:2], item[1])
+    ):
+        for number, line in enumerate(read(path).splitlines(), start=1):
+            if expression.search(line):
+                yield name, task_index, number, line
+
+
+def summary(kind: str, backend: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """the number, compressed number, empty number and size of the logs per backend"""
+    backends: Dict[str, Dict[str, int]] = {}
+    for (name, _, _), path in index(kind, backend).items():
+        size = os.path.getsize(path)
+        counts = backends.setdefault(
+            name, {"logs": 0, "compressed": 0, "empty": 0, "size": 0}
+        )
+        counts["logs"] += 1
+        counts["compressed"] += path.endswith(_compressed)
+        counts["empty"] += size == 0
+        counts["size"] += size
+    return backends
+
+
+def failed(
+    backend: Optional[str] = None,
+) -> List[Tuple[str, Optional[int], List[str]]]:
+    """
+    (hash, task index, error logs) of the simulations which failed and have
+    not finished since, the task index is None for failures recorded without
+    one. The logs are found by hash, so they are those of the failed
+    simulation even if its task index was reassigned since.
+    """
+    logs = by_hash("err", backend)
+    return [
+        (item_hash, record.get("index"), logs.get(item_hash, []))
+        for item_hash, record in simset.ledger.failures().items()
+        if backend is None or record.get("backend", backend) == backend
+    ]
+
+
+def compress_log(path: str):
+    """replace a log by its gzip compressed copy"""
+    temporary_filename = f"{path}{_compressed}.{os.getpid()}.tmp"
+    with open(path, "rb") as source, gzip.open(temporary_filename, "wb") as f:
+        while True:
+            data = source.read(1 << 20)
+            if not data:
+                break
+            f.write(data)
+    os.replace(temporary_filename, path + _compressed)
+    os.remove(path)
+
+
+def compress(backend: Optional[str] = None) -> int:
+    """
+    Compress the logs of the finished and failed simulations and return
+    the number of logs compressed.
+
+    Logs of simulations which are not in the ledger are left alone as they
+    may still be written to, and so are logs named after their task index
+    only, which may belong to a task set up since.
+    """
+    done = simset.ledger.completed() | set(simset.ledger.failures())
+    number = 0
+    for kind in kinds:
+        for (_, _, item_hash), path in index(kind, backend).items():
+            if item_hash in done and not path.endswith(_compressed):
+                compress_log(path)
+                number += 1
+    return number
@@ -0,0 +1,182 @@
+import functools
+import hashlib
+import logging
+import multiprocessing
+import os
+import pickle
+import types
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import simset
+from .post_processing import _get_simulated_args
+
+logger = logging.getLogger(__name__)
+
+_aggregates_folder = "aggregates"
+
+
+def _code_digest(code, digest):
+    digest.update(code.co_code)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            _code_digest(constant, digest)
+        else:
+            digest.update(repr(constant).encode())
+
+
+def aggregate_filename(map_function: Callable, reduce_function: Callable) -> str:
+    """
+    return the absolute path of the cached aggregate of a map and reduce
+    pair, named after the functions and a hash of their code so that
+    editing either of them starts a new cache
+    """
+    name = "-".join(
+        f"{function.__module__}.{function.__qualname__}"
+        for function in (map_function, reduce_function)
+    )
+    digest = hashlib.sha256()
+    for function in (map_function, reduce_function):
+        code = getattr(function, "__code__", None)
+        if code is not None:
+            _code_digest(code, digest)
+    return os.path.join(
+        simset.data_folder,
+        _aggregates_folder,
+        f"{name}-{digest.hexdigest()[:16]}.pkl",
+    )
+
+
+def _map_chunk(
+    map_function: Callable, load: Callable, item_hashes: List[str]
+) -> List[Tuple[str, Any]]:
+    return [
+        (item_hash, map_function(simset.store.load_result(item_hash, load)))
+        for item_hash in item_hashes
+    ]
+
+
+def _map(
+    map_function: Callable, load: Callable, item_hashes: List[str], workers: int
+) -> Dict[str, Any]:
+    """map the results of item_hashes in a pool of forked processes, or in
+    this process for a single worker"""
+    if not item_hashes:
+        return {}
+    if workers == 1:
+        return dict(_map_chunk(map_function, load, item_hashes))
+    chunk_size = -(-len(item_hashes) // (4 * workers))
+    chunks = [
+        item_hashes[start : start + chunk_size]
+        for start in range(0, len(item_hashes), chunk_size)
+    ]
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        mapped = {}
+        for pairs in executor.map(
+            functools.partial(_map_chunk, map_function, load), chunks
+        ):
+            mapped.update(pairs)
+    return mapped
+
+
+def _read_cache(filename: str) -> Dict:
+    try:
+        with open(filename, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return {}
+
+
+def _write_cache(filename: str, cache: Dict):
+    temporary_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary_filename, "wb") as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_filename, filename)
+
+
+def map_reduce(
+    map_function: Callable,
+    reduce_function: Callable,
+    load: Callable,
+    workers: Optional[int] = None,
+    fresh: bool = False,
+    where: Optional[Dict[str, Any]] = None,
+):
+    """
+    Map every finished result and reduce the mapped values to one aggregate.
+
+    The results are loaded and mapped in a pool of processes forked from
+    this one. The mapped value of every result is cached together with the
+    aggregate in .data/aggregates, so that a later call only loads and maps
+    the results that are new, or were simulated again since, and merges
+    them into the cached aggregate. If cached results were simulated again
+    or left the argument grid the aggregate is reduced anew from the cached
+    values, without loading any result.
+
+    The cache is keyed by the names and code of map_function and
+    reduce_function, pass fresh after changing what they depend on, such
+    as the functions they call.
+
+    Parameters
+    ----------
+    map_function: (res) -> value
+        maps a single result.
+    reduce_function: (value, value) -> value
+        an associative function merging two values, new results are
+        merged after the cached aggregate so it should also be commutative
+        unless the order does not matter.
+    load: (filename) -> res
+        the function loading results.
+    workers: `int`
+        number of worker processes, defaults to simset.concurrent_jobs.
+    fresh: `bool`
+        ignore the cache and map all results again.
+    where: `dict`
+        only reduce the results whose arguments match, see
+        simset.post_processing.post_processing.
+
+    Returns
+    -------
+    the aggregate, None if there are no finished results.
+    """
+    if workers is None:
+        workers = simset.concurrent_jobs
+    filename = aggregate_filename(map_function, reduce_function)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    records = simset.ledger.records()
+    item_hashes = _get_simulated_args(where)
+    cache = {} if fresh else _read_cache(filename)
+    cached_records = cache.get("records", {})
+    mapped = {
+        item_hash: value
+        for item_hash, value in cache.get("mapped", {}).items()
+        if cached_records.get(item_hash) == records.get(item_hash, {})
+    }
+    new_hashes = [item_hash for item_hash in item_hashes if item_hash not in mapped]
+    logger.info(
+        f"mapping {len(new_hashes)} new of {len(item_hashes)} results on {workers} workers"
+    )
+    new_mapped = _map(map_function, load, new_hashes, workers)
+    mapped.update(new_mapped)
+
+    aggregated = cache.get("hashes")
+    if aggregated is not None and set(aggregated) == set(item_hashes) - set(new_hashes):
+        # every cached value in the aggregate is still current
+        values = [cache["aggregate"]] if aggregated else []
+        values += [new_mapped[item_hash] for item_hash in new_hashes]
+    else:
+        values = [mapped[item_hash] for item_hash in item_hashes]
+    aggregate = functools.reduce(reduce_function, values) if values else None
+
+    _write_cache(
+        filename,
+        {
+            "records": {item_hash: records.get(item_hash, {}) for item_hash in mapped},
+            "mapped": mapped,
+            "hashes": item_hashes,
+            "aggregate": aggregate,
+        },
+    )
+    return aggregate
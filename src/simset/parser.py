@@ -12,7 +12,7 @@ def _parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "action",
         help="determine action",
-        choices=['init', 'clean'],
+        choices=['init', 'clean', 'reindex', 'missing'],
     )
 
     parser.add_argument(
@@ -25,9 +25,15 @@ def _parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "-p",
         "--path",
-        help="specify folder for init action",
+        help="specify simset folder for init, clean, reindex and missing actions",
         default=os.getcwd(),
     )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        help="completion ledger of a remote copy, missing lists the results it has that are not here and reindex keeps its records",
+        default=None,
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -82,13 +88,99 @@ def simulate_process_parser() -> argparse.Namespace:
         help="execute a particular simulation",
         description="invoke a particular simulation setup",
     )
-    simulate_execute_parser.add_argument(
+    simulate_execute_group = simulate_execute_parser.add_mutually_exclusive_group(
+        required=True
+    )
+    simulate_execute_group.add_argument(
         "-i",
         "--index",
         help="specify simulation index",
         type=int,
         nargs='?',
-        required=True,
+    )
+    simulate_execute_group.add_argument(
+        "--chunk",
+        help="execute the chunk:th contiguous block of simulations, requires --of",
+        type=int,
+    )
+    simulate_execute_parser.add_argument(
+        "--of",
+        help="the total number of chunks",
+        type=int,
+    )
+    simulate_execute_parser.add_argument(
+        "--slot",
+        help="one based job slot, recorded in the ledger and pins the simulation to its cores if simset.cpu_affinity is set",
+        type=int,
+        default=None,
+    )
+    simulate_execute_parser.add_argument(
+        "--backend",
+        help="the backend running the simulations, with --chunk the output of each simulation is written to its out and err folders",
+        type=str,
+        default=None,
+    )
+    simulate_execute_parser.add_argument(
+        "--profile",
+        help="dump a cProfile profile of every simulation to the <backend>/profile, or the profile folder",
+        default=False,
+        action='store_true',
+    )
+    # The in-process worker pool
+    simulate_run_parser = simulate_subparsers.add_parser(
+        'run',
+        help="run all simulations in a local worker pool",
+        description="run all unsimulated simulations in a pool of worker processes forked from this process",
+    )
+    simulate_run_parser.add_argument(
+        "-w",
+        "--workers",
+        help="number of worker processes, defaults to simset.concurrent_jobs",
+        type=int,
+        default=None,
+    )
+    simulate_run_parser.add_argument(
+        "-c",
+        "--chunk-size",
+        help="number of simulations handed to a worker at a time",
+        type=int,
+        default=1,
+    )
+    simulate_run_parser.add_argument(
+        "--fork",
+        help="fork a fresh process for every chunk instead of reusing workers",
+        default=False,
+        action='store_true',
+    )
+    simulate_run_parser.add_argument(
+        "--profile",
+        help="dump a cProfile profile of every simulation to the pool/profile folder",
+        default=False,
+        action='store_true',
+    )
+    # The shared work queue
+    simulate_work_parser = simulate_subparsers.add_parser(
+        'work',
+        help="claim and run simulations from a shared queue",
+        description="repeatedly claim the next pending simulation from a queue in the data folder shared by any number of concurrent workers",
+    )
+    simulate_work_parser.add_argument(
+        "--lease",
+        help="seconds without heartbeat before a claimed simulation is re-queued, defaults to simset.queue_lease_time",
+        type=float,
+        default=None,
+    )
+    simulate_work_parser.add_argument(
+        "--reset",
+        help="clear all claims before starting, e.g. to retry failed simulations",
+        default=False,
+        action='store_true',
+    )
+    simulate_work_parser.add_argument(
+        "--profile",
+        help="dump a cProfile profile of every simulation to the queue/profile folder",
+        default=False,
+        action='store_true',
     )
     # The local simulation
     simulate_setup_parser = simulate_subparsers.add_parser(
@@ -104,16 +196,105 @@ def simulate_process_parser() -> argparse.Namespace:
     simulate_setup_parser.add_argument(
         'host',
         type=str,
-        nargs="?",
-        default="localhost",
-        help="ssh remote host if applicable",
+        nargs="*",
+        default=["localhost"],
+        help="ssh remote host(s) if applicable, tasks are dispatched across several hosts",
+    )
+    # The multi host dispatcher
+    simulate_dispatch_parser = simulate_subparsers.add_parser(
+        'dispatch',
+        help="dispatch simulations across several hosts",
+        description="run the simulations of the task table concurrently across several ssh hosts, re-assigning the work of hosts that fail",
+    )
+    simulate_dispatch_parser.add_argument(
+        'host',
+        type=str,
+        nargs="+",
+        help="ssh remote hosts",
     )
 
-    subparsers.add_parser(
+    process = subparsers.add_parser(
         'process',
         help='execute the post-processing function',
         description="runs the post_processing_function(...) function in the main.py file sequentially over all available argument combinations",
     )
+    process.add_argument(
+        "-w",
+        "--where",
+        help="only process results whose argument name equals value, repeat a name to accept several values",
+        metavar="NAME=VALUE",
+        action="append",
+        default=[],
+    )
+    process.add_argument(
+        "--with-args",
+        help="pass the post-processing function (args, result) items, with the arguments of each result by name",
+        default=False,
+        action='store_true',
+    )
+    process.add_argument(
+        "--fresh",
+        help="ignore the cached aggregate of the map and reduce functions and map all results again",
+        default=False,
+        action='store_true',
+    )
+
+    subparsers.add_parser(
+        'gather',
+        help='consolidate the results into a single file',
+        description="load the results not yet gathered with the load(...) function in the main.py file and append them to a consolidated file, which process reads from while it is up to date, mapping the arrays within the results instead of loading them",
+    )
+
+    profile = subparsers.add_parser(
+        'profile', help="inspect the profiles of simulations run with --profile"
+    )
+    profile_subparsers = profile.add_subparsers(
+        title="profile",
+        dest="command",
+        required=True,
+        description="choose what to do with the profiles",
+        help="what to do with the profiles?",
+    )
+    profile_merge_parser = profile_subparsers.add_parser(
+        'merge',
+        help="combine the profiles into one",
+        description="combine the per simulation profiles into one aggregated profile and print its most expensive functions",
+    )
+    profile_merge_parser.add_argument(
+        "-w",
+        "--where",
+        help="only merge profiles of simulations whose argument name equals value, repeat a name to accept several values",
+        metavar="NAME=VALUE",
+        action="append",
+        default=[],
+    )
+    profile_merge_parser.add_argument(
+        "-o",
+        "--output",
+        help="the file to dump the merged profile to",
+        type=str,
+        default="profile.pstats",
+    )
+    profile_merge_parser.add_argument(
+        "-n",
+        "--lines",
+        help="number of functions to print, sorted by cumulative time",
+        type=int,
+        default=20,
+    )
+
+    trace = subparsers.add_parser(
+        'trace',
+        help="export a timeline of the simulations",
+        description="write the recorded start and end of every simulation, split into load, compute and save and laid out per host and job slot, as a Chrome trace viewable in Perfetto or chrome://tracing",
+    )
+    trace.add_argument(
+        "-o",
+        "--output",
+        help="the trace file to write",
+        type=str,
+        default="trace.json",
+    )
 
     info = subparsers.add_parser(
         'info', help="display information about current state of simulations"
@@ -133,14 +314,53 @@ def simulate_process_parser() -> argparse.Namespace:
         description="shows parameter settings of unsimulated simulations",
     )
 
-    log = subparsers.add_parser('output', help="display simulation output")
-    log.add_argument(
-        "index", help="specify file index", type=int, nargs='?', default=-1
+    info_subparser.add_parser(
+        'stats',
+        help="shows the resources used by the finished simulations",
+        description="summarizes wall time, CPU time, peak memory and result size of the finished simulations, per argument value and for the slowest configurations",
     )
 
+    log = subparsers.add_parser('output', help="display simulation output")
     err = subparsers.add_parser('error', help="display and mange simulation errors")
+    for log_parser in [log, err]:
+        log_parser.add_argument(
+            "index", help="specify task index", type=int, nargs='?', default=-1
+        )
+        log_parser.add_argument(
+            "--hash",
+            help="display the logs of the simulation with this hash, whatever its task index",
+            type=str,
+            default=None,
+        )
+        log_parser.add_argument(
+            "--backend",
+            help="only the logs of this backend",
+            type=str,
+            default=None,
+        )
+        log_parser.add_argument(
+            "--tail",
+            help="display only the last lines of each log",
+            type=int,
+            default=None,
+        )
+        log_parser.add_argument(
+            "--grep",
+            help="display the lines of all logs matching a regular expression",
+            type=str,
+            default=None,
+        )
+        log_parser.add_argument(
+            "--compress",
+            help="gzip compress the logs of the finished and failed simulations",
+            default=False,
+            action='store_true',
+        )
     err.add_argument(
-        "index", help="specify file index", type=int, nargs='?', default=-1
+        "--failed",
+        help="display the errors of the simulations which failed and have not finished since",
+        default=False,
+        action='store_true',
     )
 
     return parser.parse_args()
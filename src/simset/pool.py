@@ -0,0 +1,219 @@
+import logging
+import multiprocessing
+import os
+import selectors
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import simset
+from .admission import MemoryGate
+from . import threads
+from .simulate import _create_folder_if_does_not_exists, _simulate_indices, _write_tasks
+
+logger = logging.getLogger(__name__)
+
+_pool_folder = "pool"
+
+# the simulate and save callables of a worker process
+_worker = {}
+
+
+def _init_worker(
+    simulation_function: Callable, save: Callable, number_of_threads: int, slots
+):
+    simset.simulate._process_started = time.time()
+    _worker["simulate"] = simulation_function
+    _worker["save"] = save
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+    threads.limit_threads(number_of_threads)
+    threads.pin(slot, number_of_threads)
+
+
+def _run_chunk(indices: List[int]) -> List[int]:
+    """run a chunk of simulations and return the indices that failed"""
+    return _simulate_indices(
+        _worker["simulate"], indices, _worker["save"], _pool_folder
+    )
+
+
+def _pool(
+    simulation_function: Callable,
+    save: Callable,
+    chunks: Iterator[List[int]],
+    workers: int,
+) -> List[int]:
+    failed = []
+    gate = MemoryGate()
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(
+            simulation_function,
+            save,
+            threads.threads_per_job(workers),
+            context.Value("i", 0),
+        ),
+    ) as executor:
+        # keep a bounded number of chunks in flight so that huge sweeps
+        # are streamed rather than submitted all at once, and hold chunks
+        # back while the memory would not fit another simulation.
+        pending = set()
+        for chunk in chunks:
+            while pending and (
+                len(pending) >= 2 * workers or not gate.admit(len(pending))
+            ):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    failed += future.result()
+            pending.add(executor.submit(_run_chunk, chunk))
+        for future in wait(pending).done:
+            failed += future.result()
+    return failed
+
+
+def _fork_chunk(
+    simulation_function: Callable,
+    save: Callable,
+    chunk: List[int],
+    slot: int,
+    number_of_threads: int,
+):
+    """fork a child running the chunk, return its pid and a pipe to read
+    the failed indices from"""
+    read_end, write_end = os.pipe()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        exit_code = 1
+        simset.simulate._process_started = time.time()
+        try:
+            threads.limit_threads(number_of_threads)
+            threads.pin(slot, number_of_threads)
+            failed = _simulate_indices(simulation_function, chunk, save, _pool_folder)
+            with os.fdopen(write_end, "w") as f:
+                f.write(" ".join(str(index) for index in failed))
+            exit_code = 0
+        finally:
+            # never return into the parent's code
+            os._exit(exit_code)
+    os.close(write_end)
+    return pid, read_end
+
+
+def _fork_server(
+    simulation_function: Callable,
+    save: Callable,
+    chunks: Iterator[List[int]],
+    workers: int,
+) -> List[int]:
+    failed = []
+    # pid -> (chunk, read end of the child's pipe, job slot)
+    running: Dict[int, Tuple[List[int], int, int]] = {}
+    # read end -> (pid, report read so far)
+    reports: Dict[int, Tuple[int, List[bytes]]] = {}
+    free_slots = list(range(workers))
+    number_of_threads = threads.threads_per_job(workers)
+    gate = MemoryGate()
+    chunk = next(chunks, None)
+    with selectors.DefaultSelector() as selector:
+        while chunk is not None or running:
+            while (
+                chunk is not None
+                and len(running) < workers
+                and gate.admit(len(running))
+            ):
+                slot = free_slots.pop(0)
+                pid, read_end = _fork_chunk(
+                    simulation_function, save, chunk, slot, number_of_threads
+                )
+                running[pid] = (chunk, read_end, slot)
+                reports[read_end] = (pid, [])
+                selector.register(read_end, selectors.EVENT_READ)
+                chunk = next(chunks, None)
+            # drain the pipes while the children run, a child whose report
+            # fills the pipe would otherwise never exit, and only reap a
+            # child once it closed its pipe
+            for key, _ in selector.select():
+                read_end = key.fd
+                pid, report = reports[read_end]
+                data = os.read(read_end, 1 << 16)
+                if data:
+                    report.append(data)
+                    continue
+                selector.unregister(read_end)
+                os.close(read_end)
+                del reports[read_end]
+                _, status = os.waitpid(pid, 0)
+                finished_chunk, _, slot = running.pop(pid)
+                free_slots.append(slot)
+                if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+                    failed += [int(index) for index in b"".join(report).split()]
+                else:
+                    logger.info(f"process running simulations {finished_chunk} died")
+                    failed += finished_chunk
+    return failed
+
+
+def run(
+    simulation_function: Callable,
+    save: Callable,
+    workers: Optional[int] = None,
+    chunk_size: int = 1,
+    fork: bool = False,
+):
+    """
+    Run all unsimulated simulations in an in-process worker pool.
+
+    main.py is only imported once, by the parent, and the workers are forked
+    from it. Task indices are streamed to the workers in chunks of chunk_size
+    and the stdout and stderr of each task are written to its logs in pool/out
+    and pool/err, see simset.simulate.simulate. Chunks are held back while the system memory
+    would not fit another simulation, see simset.admission.
+
+    Parameters
+    ----------
+    simulation_function: (args) -> res
+        the simulation function.
+    save: (res, filename) -> None
+        the function storing results.
+    workers: `int`
+        number of worker processes, defaults to simset.concurrent_jobs.
+    chunk_size: `int`
+        number of consecutive task indices handed to a worker at a time.
+    fork: `bool`
+        act as a fork server: fork a fresh child for every chunk, isolating
+        the chunks from each other, instead of reusing long lived workers.
+    """
+    if workers is None:
+        workers = simset.concurrent_jobs
+    if workers < 1 or chunk_size < 1:
+        raise Exception("workers and chunk size must be greater than 0")
+
+    simset._data_folder_exist()
+    number_of_simulations = _write_tasks()
+    _create_folder_if_does_not_exists(os.path.join(_pool_folder, "out"))
+    _create_folder_if_does_not_exists(os.path.join(_pool_folder, "err"))
+
+    logger.info(f"running {number_of_simulations} simulations on {workers} workers")
+    chunks = (
+        list(range(start, min(start + chunk_size, number_of_simulations + 1)))
+        for start in range(1, number_of_simulations + 1, chunk_size)
+    )
+    if fork:
+        failed = _fork_server(simulation_function, save, chunks, workers)
+    else:
+        failed = _pool(simulation_function, save, chunks, workers)
+
+    if failed:
+        logger.info(
+            f"{len(failed)} simulations failed, see {_pool_folder}/err for indices: {sorted(failed)}"
+        )
+    logger.info(f"{number_of_simulations - len(failed)} simulations finished")
+    return failed
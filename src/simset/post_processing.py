@@ -1,28 +1,177 @@
+import ast
+import collections
 import logging
-from typing import Callable
+import multiprocessing
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 import simset
 
 logger = logging.getLogger(__name__)
 
 
-def _get_simulated_args():
-    simulated = []
+class Item(NamedTuple):
+    """a result together with its arguments, by name"""
+
+    args: Dict[str, Any]
+    result: Any
+
+
+def _finished(where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Tuple]]:
+    """
+    the (hash, argument tuple) pairs of the finished simulations, restricted
+    to the arguments matching where if given, see simset.grid.matches.
+    """
     simulated_hashes = simset._get_simulated_arg_hashes()
-    for key in simset._hash_to_args:
-        if key in simulated_hashes:
-            simulated.append(key)
-    return simulated
+    if where:
+        pairs = simset._grid.select(where)
+    else:
+        pairs = simset._hash_to_args.items()
+    return [(key, args) for key, args in pairs if key in simulated_hashes]
+
+
+def _args_dict(arg_tuple: Tuple) -> Dict[str, Any]:
+    """the arguments of an argument tuple by name, in registration order"""
+    names, values = arg_tuple
+    return dict(zip(names[::-1], values[::-1]))
 
 
-def post_processing(processing_function, load: Callable):
+def _get_simulated_args(where: Optional[Dict[str, Any]] = None) -> List[str]:
+    return [key for key, _ in _finished(where)]
+
+
+def parse_where(expressions: List[str]) -> Dict[str, Callable]:
     """
-    load and pass results to processing_function
+    turn name=value expressions, as given on the command line, into a where
+    condition. Values are compared both as Python literals and as text and
+    repeating a name accepts any of its values.
+    """
+    accepted: Dict[str, List[str]] = {}
+    for expression in expressions:
+        name, separator, text = expression.partition("=")
+        if not separator:
+            raise Exception(f"expected name=value, got: {expression}")
+        accepted.setdefault(name.strip(), []).append(text.strip())
+
+    def condition(texts: List[str]) -> Callable:
+        literals = []
+        for text in texts:
+            try:
+                literals.append(ast.literal_eval(text))
+            except (ValueError, SyntaxError):
+                pass
+        return lambda value: str(value) in texts or value in literals
+
+    return {name: condition(texts) for name, texts in accepted.items()}
+
+
+def _executor(workers: int) -> Executor:
+    if simset.prefetch_processes:
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        )
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="simset-load")
+
+
+def _next_done(pending: Deque[Future]) -> List[Future]:
+    """remove and return the next finished loads, the oldest if ordered"""
+    if simset.prefetch_ordered:
+        return [pending.popleft()]
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+    return list(done)
+
+
+def _load_pair(item_hash: str, load: Callable) -> Tuple[str, Any]:
+    return item_hash, simset.store.load_result(item_hash, load)
+
+
+def _prefetched(item_hashes: List[str], load: Callable) -> Iterator:
+    """
+    Load results in a pool of simset.prefetch_workers threads, or processes
+    if simset.prefetch_processes is set, ahead of the consumer.
+
+    At most simset.prefetch_window results, by default twice the number of
+    workers, are loaded or waiting to be consumed at any time. Results are
+    yielded in order if simset.prefetch_ordered is set and as soon as they
+    are loaded otherwise, as (hash, result) pairs.
+    """
+    workers = simset.prefetch_workers
+    window = max(1, simset.prefetch_window or 2 * workers)
+    executor = _executor(workers)
+    pending: Deque[Future] = collections.deque()
+    try:
+        for item_hash in item_hashes:
+            pending.append(executor.submit(_load_pair, item_hash, load))
+            while len(pending) >= window:
+                for future in _next_done(pending):
+                    yield future.result()
+        while pending:
+            for future in _next_done(pending):
+                yield future.result()
+    finally:
+        # the consumer may stop early, drop the results nobody will read
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def post_processing(
+    processing_function,
+    load: Callable,
+    where: Optional[Dict[str, Any]] = None,
+    with_args: bool = False,
+):
+    """
+    load and pass results to processing_function, from the file consolidated
+    by gather if no simulation has finished since
+
+    Parameters
+    ----------
+    processing_function: (results) -> None
+        the function processing an iterable of results.
+    load: (filename) -> res
+        the function loading results.
+    where: `dict`
+        only load the results whose arguments match, mapping argument names
+        to a value, a list, tuple or set of values, or a predicate. Results
+        that do not match are never opened.
+    with_args: `bool`
+        pass Item(args, result) pairs, with the arguments of each result as
+        a dict by name, instead of the bare results.
     """
-    finished_simulated = _get_simulated_args()
+    finished_simulated = _finished(where)
+    item_hashes = [item_hash for item_hash, _ in finished_simulated]
 
-    def _results():
-        filenames = [simset.data_path(item_hash) for item_hash in finished_simulated]
-        for filename in filenames:
-            yield load(filename)
+    if simset.gather.up_to_date(item_hashes):
+        logger.debug("reading the results from the consolidated file")
+        pairs = zip(item_hashes, simset.gather.results(item_hashes))
+    elif simset.prefetch_workers:
+        pairs = _prefetched(item_hashes, load)
+    else:
+        pairs = (_load_pair(item_hash, load) for item_hash in item_hashes)
 
-    processing_function(_results())
+    if not with_args:
+        processing_function(result for _, result in pairs)
+        return
+    arguments = dict(finished_simulated)
+    processing_function(
+        Item(_args_dict(arguments[item_hash]), result) for item_hash, result in pairs
+    )
@@ -0,0 +1,48 @@
+import glob
+import logging
+import os
+import pstats
+from typing import Any, Dict, Iterator, Optional, Tuple
+import simset
+from .simulate import _backends
+
+logger = logging.getLogger(__name__)
+
+
+def profile_files() -> Iterator[Tuple[str, str]]:
+    """
+    the (filename, hash) pairs of the profiles dumped by simulations run
+    with --profile, from the profile folder and those of the backends
+    """
+    for folder in [
+        "profile",
+        *(os.path.join(backend, "profile") for backend in _backends),
+    ]:
+        for filename in sorted(glob.glob(os.path.join(folder, "*.pstats"))):
+            # <index>.<hash>.pstats
+            yield filename, os.path.basename(filename).split(".")[1]
+
+
+def merge(output: str, where: Optional[Dict[str, Any]] = None) -> pstats.Stats:
+    """
+    Combine the profiles of all profiled simulations, or of those whose
+    arguments match where, into one profile and dump it to output.
+
+    Profiles of a simulation that was run several times are all included.
+    """
+    selected = None
+    if where:
+        selected = {item_hash for item_hash, _ in simset._grid.select(where)}
+    filenames = [
+        filename
+        for filename, item_hash in profile_files()
+        if selected is None or item_hash in selected
+    ]
+    if not filenames:
+        raise Exception("no profiles found, run the simulations with --profile")
+    logger.info(f"merging {len(filenames)} profiles into {output}")
+    stats = pstats.Stats(filenames[0])
+    for filename in filenames[1:]:
+        stats.add(filename)
+    stats.dump_stats(output)
+    return stats
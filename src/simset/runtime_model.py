@@ -0,0 +1,113 @@
+import heapq
+import math
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+import simset
+
+# the largest number of finished simulations used to fit the model
+_max_samples = 10000
+_min_duration = 1e-6
+
+
+class RuntimeModel:
+    """
+    A multiplicative runtime model with one factor per argument value.
+
+    The logarithm of the duration is modelled as a global mean plus an
+    additive effect for the value of each argument axis, fitted by
+    backfitting over the measured durations of finished simulations.
+    Values never seen before contribute no effect.
+    """
+
+    def __init__(self, mean: float, effects: Dict[str, Dict[str, float]]):
+        self.mean = mean
+        self.effects = effects
+
+    @classmethod
+    def fit(cls, samples: Sequence[Tuple[Tuple, float]], iterations: int = 5):
+        """
+        fit the model from (argument tuple, duration in seconds) samples.
+        """
+        stride = max(1, len(samples) // _max_samples)
+        samples = samples[::stride]
+        targets = [math.log(max(duration, _min_duration)) for _, duration in samples]
+        # the value of each axis per sample, None if the sample lacks the axis
+        columns: Dict[str, List] = defaultdict(lambda: [None] * len(samples))
+        for index, (args, _) in enumerate(samples):
+            for name, value in zip(*args):
+                columns[name][index] = str(value)
+        mean = sum(targets) / len(targets)
+        fitted = [mean] * len(targets)
+        effects: Dict[str, Dict[str, float]] = {name: {} for name in columns}
+        for _ in range(iterations):
+            for name, column in columns.items():
+                effect = effects[name]
+                sums: Dict[str, float] = defaultdict(float)
+                counts: Dict[str, int] = defaultdict(int)
+                for index, value in enumerate(column):
+                    if value is not None:
+                        sums[value] += (
+                            targets[index] - fitted[index] + effect.get(value, 0.0)
+                        )
+                        counts[value] += 1
+                new_effect = {value: sums[value] / counts[value] for value in sums}
+                for index, value in enumerate(column):
+                    if value is not None:
+                        fitted[index] += new_effect[value] - effect.get(value, 0.0)
+                effects[name] = new_effect
+        return cls(mean, dict(effects))
+
+    def predict(self, args: Tuple) -> float:
+        """return the expected duration in seconds of an argument tuple"""
+        log_duration = self.mean
+        for name, value in zip(*args):
+            log_duration += self.effects.get(name, {}).get(str(value), 0.0)
+        return math.exp(log_duration)
+
+
+def pack(order: List[int], durations: List[float], capacities: List[int]) -> List[int]:
+    """
+    Pack tasks into consecutive chunks with balanced expected durations.
+
+    Tasks are taken in the given (longest first) order and each is put in
+    the chunk with the least expected load that still has room, the
+    longest-processing-time-first rule.
+
+    Returns
+    -------
+    the task order laid out chunk after chunk.
+    """
+    heap = [(0.0, chunk) for chunk, capacity in enumerate(capacities) if capacity > 0]
+    chunks: List[List[int]] = [[] for _ in capacities]
+    for task in order:
+        load, chunk = heapq.heappop(heap)
+        chunks[chunk].append(task)
+        if len(chunks[chunk]) < capacities[chunk]:
+            heapq.heappush(heap, (load + durations[task], chunk))
+    return [task for chunk in chunks for task in chunk]
+
+
+def longest_first():
+    """
+    Return the unsimulated (hash, args) tasks, longest expected duration
+    first, together with their expected durations.
+
+    The model is fitted to the durations the completion ledger holds for
+    finished simulations. Without any such measurement the tasks keep grid
+    order and the durations are None.
+    """
+    records = simset.ledger.records()
+    samples = []
+    unsimulated = []
+    for item_hash, args in simset._hash_to_args.items():
+        record = records.get(item_hash)
+        if record is None:
+            unsimulated.append((item_hash, args))
+        elif "time" in record:
+            samples.append((args, record["time"]))
+    if not samples or not unsimulated:
+        return unsimulated, None
+    model = RuntimeModel.fit(samples)
+    durations = [model.predict(args) for _, args in unsimulated]
+    order = sorted(range(len(unsimulated)), key=lambda task: -durations[task])
+    return [unsimulated[task] for task in order], [durations[task] for task in order]
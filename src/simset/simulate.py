@@ -1,22 +1,60 @@
 import argparse
+import contextlib
+import cProfile
+import resource
+import socket
+import sys
 import time
-from typing import Callable, Dict, List
+import traceback
+from typing import Callable, Dict, List, Optional, Tuple
 import simset
 import logging
 import os
-import jinja2
+from .task_table import TaskTable, write_task_table
+from . import runtime_model
+from .admission import task_memory_requirement
+from . import threads
 
 
 logger = logging.getLogger(__name__)
 
-_simulated_list_filename = os.path.join(".data", "unsimulated_list.txt")
+# the task files live in their own folder so that writing them does not
+# touch the data folder, which would mark the completion ledger stale
+_tasks_folder = os.path.join(".data", "tasks")
+_simulated_list_filename = os.path.join(_tasks_folder, "unsimulated_list.txt")
+_task_table_filename = os.path.join(_tasks_folder, "tasks.bin")
+# the task list of data folders set up before the task table existed
+_legacy_simulated_list_filename = os.path.join(".data", "unsimulated_list.txt")
+# the control socket of the shared ssh connections, see _ssh_options
+_ssh_control_path = "~/.ssh/simset-%C"
+# the folders the backends write their logs to
+_backends = ['local', 'parallel', 'condor', 'euler', 'remote', 'pool', 'queue']
 
-env = jinja2.Environment(
-    loader=jinja2.PackageLoader("simset", package_path="templates"),
-    autoescape=jinja2.select_autoescape(),
-    trim_blocks=True,
-    lstrip_blocks=True,
-)
+_env = None
+
+# when this interpreter, or a worker forked from it, started running tasks
+_process_started = time.time()
+_host = socket.gethostname()
+# the number of simulations executed by this process
+_executed = 0
+
+
+def _environment():
+    """
+    the jinja2 template environment, created on first use so that executing
+    a simulation does not pay for importing jinja2.
+    """
+    global _env
+    if _env is None:
+        import jinja2
+
+        _env = jinja2.Environment(
+            loader=jinja2.PackageLoader("simset", package_path="templates"),
+            autoescape=jinja2.select_autoescape(),
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+    return _env
 
 
 def _save_unsimulated_file(list: List[str], filename: str = _simulated_list_filename):
@@ -36,13 +74,109 @@ def _load_unsimulated_file(filename: str = _simulated_list_filename) -> List[str
 
 
 def _get_unsimulated_args():
-    unsimulated = []
     simulated_hashes = simset._get_simulated_arg_hashes()
-    for key in simset._hash_to_args:
-        item_hash = key
+    return [key for key in simset._hash_to_args if key not in simulated_hashes]
+
+
+def _unsimulated_tasks():
+    simulated_hashes = simset._get_simulated_arg_hashes()
+    for item_hash, args in simset._hash_to_args.items():
         if item_hash not in simulated_hashes:
-            unsimulated.append(item_hash)
-    return unsimulated
+            yield item_hash, args
+
+
+def _load_task(index: int):
+    """return the (hash, args) pair for a one based task index"""
+    if not os.path.exists(_task_table_filename):
+        # task lists written before the task table existed
+        unsimulated_list = _load_unsimulated_file(_legacy_simulated_list_filename)
+        if not index < (len(unsimulated_list) + 1) or index < 1:
+            raise Exception(
+                f"index {index} not within range 1 <= index < {len(unsimulated_list) + 1}"
+            )
+        item_hash = str(unsimulated_list[index - 1])
+        return item_hash, simset._hash_to_args[item_hash]
+
+    with TaskTable(_task_table_filename) as table:
+        if not index < (len(table) + 1) or index < 1:
+            raise Exception(
+                f"index {index} not within range 1 <= index < {len(table) + 1}"
+            )
+        return table[index - 1]
+
+
+def _number_of_tasks() -> int:
+    """return the number of tasks in the current task table"""
+    if not os.path.exists(_task_table_filename):
+        return len(_load_unsimulated_file(_legacy_simulated_list_filename))
+    with TaskTable(_task_table_filename) as table:
+        return len(table)
+
+
+def _chunk_indices(chunk: int, number_of_chunks: int, number_of_simulations: int):
+    """return the contiguous one based task indices of a chunk"""
+    if not 1 <= chunk <= number_of_chunks:
+        raise Exception(
+            f"chunk {chunk} not within range 1 <= chunk <= {number_of_chunks}"
+        )
+    size = -(-number_of_simulations // number_of_chunks)
+    return range((chunk - 1) * size + 1, min(chunk * size, number_of_simulations) + 1)
+
+
+def _number_of_jobs(number_of_simulations: int) -> int:
+    """the number of scheduler jobs when each runs simset.tasks_per_job simulations"""
+    return -(-number_of_simulations // max(1, simset.tasks_per_job))
+
+
+def _chunked() -> bool:
+    return simset.tasks_per_job > 1
+
+
+def _execute_arguments(job: str, number_of_jobs: int, backend: str) -> List[str]:
+    """the simulate execute arguments for a single scheduler job"""
+    if _chunked():
+        return ["--chunk", job, "--of", str(number_of_jobs), "--backend", backend]
+    return ["-i", job, "--backend", backend]
+
+
+def _backend_folders(backend: str):
+    """
+    create the log folders of a backend and return the (output, error)
+    folders for the logs written by the scheduler.
+
+    The logs of every simulation are written to <backend>/out and
+    <backend>/err by simulate execute itself, see simulate, and the
+    scheduler logs of whole jobs go to <backend>/log.
+    """
+    for folder in ["out", "err", "log"]:
+        _create_folder_if_does_not_exists(os.path.join(backend, folder))
+    log_folder = os.path.join(backend, "log")
+    return log_folder, log_folder
+
+
+@contextlib.contextmanager
+def _redirect_output(output_filename: str, error_filename: str):
+    """
+    Redirect stdout and stderr, including output from C extensions,
+    to files for the duration of a single simulation.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+    try:
+        with open(output_filename, "w") as out, open(error_filename, "w") as err:
+            os.dup2(out.fileno(), 1)
+            os.dup2(err.fileno(), 2)
+            try:
+                yield
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(saved_stdout, 1)
+                os.dup2(saved_stderr, 2)
+    finally:
+        os.close(saved_stdout)
+        os.close(saved_stderr)
 
 
 def _create_folder_if_does_not_exists(path: str):
@@ -64,7 +198,7 @@ def _bash_script(
     if not os.path.splitext(configuration_file_name)[1] == ".sh":
         configuration_file_name += ".sh"
 
-    template = env.get_template('bash.sh.j2')
+    template = _environment().get_template('bash.sh.j2')
 
     if os.path.exists(configuration_file_name):
         os.remove(configuration_file_name)
@@ -78,44 +212,198 @@ def _bash_script(
     return {"command": f"./{configuration_file_name}", "description": description}
 
 
-def _rsync(
-    configuration_file_name: str,
+def _rsync_command(
     path: str,
     dest: str,
-    description: str = '',
     delete: bool = False,
-):
+    include: List[str] = [],
+    exclude: List[str] = [],
+    files_from: Optional[str] = None,
+) -> str:
 
     command_list = ["rsync", "-auzP"]
 
+    if simset.ssh_multiplexing:
+        command_list += [f"-e '{' '.join(['ssh', *_ssh_options()])}'"]
+
+    if simset.compression is not None:
+        # results are compressed already, do not compress them again
+        command_list += ["--skip-compress=data/pack"]
+
     if delete:
         command_list += ["--delete"]
 
+    if files_from is not None:
+        # results listed by one ledger may be packed rather than files
+        command_list += [f"--files-from='{files_from}'", "--ignore-missing-args"]
+
+    command_list += [f"--include='{pattern}'" for pattern in include]
+    command_list += [f"--exclude='{pattern}'" for pattern in exclude]
+
     command_list += [
         f"'{path}'",
         f"'{dest}'",
     ]
+    return " ".join(command_list)
+
+
+def _rsync(
+    configuration_file_name: str,
+    path: str,
+    dest: str,
+    description: str = '',
+    delete: bool = False,
+    exclude: List[str] = [],
+):
 
     return _bash_script(
         configuration_file_name,
-        [{"command": " ".join(command_list), "description": description}],
+        [
+            {
+                "command": _rsync_command(path, dest, delete=delete, exclude=exclude),
+                "description": description,
+            }
+        ],
         description=description,
     )
 
 
+def _upload_excludes(cwd_basename: str) -> List[str]:
+    """
+    rsync patterns of the results and logs within the working directory,
+    which the upload leaves out. Being excluded they are also kept on the
+    remote by --delete.
+    """
+    root = f"/{cwd_basename}"
+    return [
+        f"{root}/.data/*.data",
+        f"{root}/.data/completed.log",
+        # the packs, gather, aggregates, queue, sync and tmp folders of the data folder
+        *(
+            f"{root}/.data/{folder}/"
+            for folder in ["packs", "gather", "aggregates", "queue", "sync", "tmp"]
+        ),
+        *(
+            f"{root}/{backend}/{logs}/*"
+            for backend in _backends
+            for logs in ["out", "err", "log"]
+        ),
+    ]
+
+
+def _upload(configuration_file_name: str, remote: str, description: str = ''):
+    """upload the code and task table, but no results or logs, to the remote"""
+    cwd = os.getcwd()
+    return _rsync(
+        configuration_file_name,
+        cwd,
+        f"{remote}:~/",
+        description=description,
+        delete=True,
+        exclude=_upload_excludes(os.path.basename(cwd)),
+    )
+
+
+def _download(configuration_file_name: str, remote: str, description: str = ''):
+    """
+    Download the results the remote finished but are missing here, and the
+    logs.
+
+    Rather than comparing the full trees, the remote completion ledger is
+    fetched and compared to the local one, and only the missing result
+    files are transferred. The packs of the remote are synced into
+    .data/sync/<remote>/packs. The local ledger is then updated keeping the
+    records of the remote ledger.
+    """
+    remote_folder = f"{remote}:~/{os.path.basename(os.getcwd())}"
+    manifest = os.path.join(".data", "sync", f"{remote}.log")
+    missing = f"{manifest}.missing"
+    simset_command = f"{simset.python_interpreter} -m simset"
+    command_list = [
+        {
+            "command": f"mkdir -p '{os.path.dirname(manifest)}'",
+            "description": "create the sync folder",
+        },
+        {
+            "command": _rsync_command(f"{remote_folder}/.data/completed.log", manifest),
+            "description": "fetch the remote completion ledger",
+        },
+        {
+            "command": f"{simset_command} missing --manifest '{manifest}' > '{missing}'",
+            "description": "list the results missing here",
+        },
+        {
+            "command": _rsync_command(
+                f"{remote_folder}/.data/", ".data/", files_from=missing
+            ),
+            "description": "fetch the missing results",
+        },
+    ]
+    if simset.result_store == "packed":
+        # kept apart from the local packs and those of other remotes, which
+        # may have the same names, and read in place, see simset.store
+        packs = os.path.join(".data", "sync", remote, "packs")
+        command_list.append(
+            {
+                "command": f"mkdir -p '{packs}' && "
+                + _rsync_command(f"{remote_folder}/.data/packs/", f"{packs}/"),
+                "description": "fetch the packed results",
+            }
+        )
+    command_list += [
+        {
+            "command": f"{simset_command} reindex --manifest '{manifest}'",
+            "description": "update the completion ledger",
+        },
+        {
+            "command": _rsync_command(
+                f"{remote_folder}/",
+                "./",
+                include=[
+                    pattern
+                    for backend in _backends
+                    for pattern in [f"/{backend}/", f"/{backend}/**"]
+                ],
+                exclude=["*"],
+            ),
+            "description": "fetch the simulation logs",
+        },
+    ]
+    return _bash_script(configuration_file_name, command_list, description=description)
+
+
+def _ssh_options() -> List[str]:
+    """
+    ssh options sharing one connection per host, opened by the first ssh or
+    rsync call and kept open for simset.ssh_control_persist seconds, if
+    simset.ssh_multiplexing is set.
+    """
+    if not simset.ssh_multiplexing:
+        return []
+    return [
+        "-o",
+        "ControlMaster=auto",
+        "-o",
+        f"ControlPath={_ssh_control_path}",
+        "-o",
+        f"ControlPersist={simset.ssh_control_persist}",
+    ]
+
+
 def _ssh(remote: str, command: List[Dict[str, str]]):
+    """run the commands one after another in a single remote shell session"""
     return [
         {
             "command": " ".join(
                 [
                     "ssh",
+                    *_ssh_options(),
                     f"{remote}",
-                    f"'{command['command']}'",
+                    f"'{'; '.join(item['command'] for item in command)}'",
                 ]
             ),
-            "description": command['description'],
+            "description": "; ".join(item['description'] for item in command),
         }
-        for command in command
     ]
 
 
@@ -127,37 +415,19 @@ def _remote(
     wait_to_return_data: bool = True,
 ):
 
-    cwd = os.getcwd()
-    cwd_basename = os.path.basename(cwd)
+    cwd_basename = os.path.basename(os.getcwd())
 
-    command_list = [
-        _rsync(
-            'upload',
-            cwd,
-            f"{remote}:~/",
-            description="copy data to remote",
-            delete=True,
-        )
-    ]
+    command_list = [_upload('upload', remote, description="copy code to remote")]
 
     temp = [
-        {
-            "command": f"cd {cwd_basename}; {command['command']}",
-            "description": command['description'],
-        }
-        for command in commands
+        {"command": f"cd {cwd_basename}", "description": f"enter {cwd_basename}"},
+        *commands,
     ]
 
     command_list += _ssh(remote, temp)
 
     command_list.append(
-        _rsync(
-            'download',
-            f"{remote}:~/{cwd_basename}",
-            '../',
-            description="copy data from remote",
-            delete=False,
-        )
+        _download('download', remote, description="copy new results from remote")
     )
     if not wait_to_return_data:
         command_list[-1][
@@ -171,78 +441,258 @@ def _remote(
     )
 
 
-def simulate(simulation_function: Callable, index: int, save: Callable):
+def _profile_filename(backend: Optional[str], index: int, item_hash: str) -> str:
+    """
+    where to dump the profile of a simulation, <backend>/profile or profile
+    without backend, named by task index and hash
     """
-    Execute simulation for index
+    folder = os.path.join(backend, "profile") if backend else "profile"
+    return os.path.join(folder, f"{index}.{item_hash}.pstats")
+
+
+def simulate(
+    simulation_function: Callable,
+    index: int,
+    save: Callable,
+    backend: Optional[str] = None,
+):
+    """
+    Execute simulation for index, profiled if simset.profile is set.
+
+    If backend is given the output of the simulation is written to its
+    logs in <backend>/out and <backend>/err, named after the task index and
+    hash, see simset.logs.log_filename, which are gzip compressed once it
+    finished if simset.compress_logs is set.
     """
     if index < 1:
         raise Exception("Simulation index must be greater than 0")
 
-    unsimulated_list = _load_unsimulated_file()
-    if not index < (len(unsimulated_list) + 1) or index < 1:
-        raise Exception(
-            f"index {index} not within range 1 <= index < {len(unsimulated_list) + 1}"
+    begun = time.time()
+    item_hash, args = _load_task(index)
+    profile_filename = None
+    if simset.profile:
+        profile_filename = _profile_filename(backend, index, item_hash)
+    task = {"index": index, "backend": backend}
+    if not backend:
+        _execute(
+            simulation_function, item_hash, args, save, profile_filename, begun, task
         )
-    item_hash = str(unsimulated_list[index - 1])
-    args = simset._hash_to_args[item_hash]
+        return
+
+    filenames = [
+        simset.logs.log_filename(kind, backend, index, item_hash)
+        for kind in simset.logs.kinds
+    ]
+    for filename in filenames:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+    try:
+        with _redirect_output(*filenames):
+            try:
+                _execute(
+                    simulation_function,
+                    item_hash,
+                    args,
+                    save,
+                    profile_filename,
+                    begun,
+                    task,
+                )
+            except Exception:
+                traceback.print_exc()
+                raise
+    finally:
+        if simset.compress_logs:
+            for filename in filenames:
+                simset.logs.compress_log(filename)
+
+
+def _max_rss() -> float:
+    """the peak resident set size of this process in MB"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # reported in bytes rather than kB
+        max_rss /= 1024
+    return max_rss / 1024
+
+
+def _cpu_times() -> Tuple[float, float]:
+    """the user and system CPU seconds of this process and its children"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + children.ru_utime, own.ru_stime + children.ru_stime
+
+
+def _execute(
+    simulation_function: Callable,
+    item_hash: str,
+    args,
+    save: Callable,
+    profile_filename: Optional[str] = None,
+    begun: Optional[float] = None,
+    task: Optional[Dict] = None,
+):
+    """
+    Run a simulation, store its result and record it in the ledger.
+
+    The record holds the time the task was begun, which is when loading it
+    started, started and ended, around the simulation itself, and saved,
+    together with where it ran and the resources it used. The peak RSS is
+    only recorded for the first simulation of a process. The task index
+    and backend in task are recorded too, they locate the logs of the task.
+    """
+    task = task or {}
     pretty_print_args = " ".join([f"{a} = {b}," for (a, b) in zip(args[0], args[1])])
     logger.info(f"Arguments: {pretty_print_args}")
-    filename = unsimulated_list[index - 1]
+    filename = item_hash
+    profiler = cProfile.Profile() if profile_filename else None
     starting_time = time.time()
-    res = simulation_function(*args[1][::-1])
+    starting_user, starting_sys = _cpu_times()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            res = simulation_function(*args[1][::-1])
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _create_folder_if_does_not_exists(os.path.dirname(profile_filename))
+                profiler.dump_stats(profile_filename)
+    except BaseException as error:
+        simset.ledger.record_failure(
+            filename,
+            {
+                "time": time.time() - starting_time,
+                "started": starting_time,
+                "error": type(error).__name__,
+                "status": 1,
+                "host": _host,
+                "pid": os.getpid(),
+                "slot": threads.current_slot(),
+                **task,
+            },
+        )
+        raise
     ending_time = time.time()
-    res.time = {
+    ending_user, ending_sys = _cpu_times()
+    timing = {
         "time": ending_time - starting_time,
         "started": starting_time,
         "ended": ending_time,
     }
-
-    # delete if target file exists
-    full_filename = os.path.join(simset.data_folder, filename + ".data")
-    if os.path.exists(full_filename):
-        os.remove(full_filename)
+    try:
+        res.time = timing
+    except AttributeError:
+        # results that cannot carry their timing, it is in the ledger anyway
+        pass
 
     # save results
-    save(res, full_filename)
+    size = simset.store.write_result(filename, res, save)
+    saved = time.time()
+
+    # the peak RSS is that of the whole process, it only belongs to this
+    # simulation if it is the first one the process executed
+    global _executed
+    _executed += 1
+    resources = {"max_rss": _max_rss()} if _executed == 1 else {}
+
+    # mark the simulation as finished
+    simset.ledger.record(
+        filename,
+        {
+            **timing,
+            "begun": starting_time if begun is None else begun,
+            "saved": saved,
+            "process_started": _process_started,
+            "host": _host,
+            "pid": os.getpid(),
+            "slot": threads.current_slot(),
+            "user": ending_user - starting_user,
+            "sys": ending_sys - starting_sys,
+            **resources,
+            "size": size,
+            "status": 0,
+            **task,
+        },
+    )
 
-    # set default permission to read only
-    os.chmod(full_filename, 0o440)
+
+def _simulate_indices(
+    simulation_function: Callable,
+    indices,
+    save: Callable,
+    backend: Optional[str] = None,
+) -> List[int]:
+    """
+    run several simulations in this interpreter and return the indices
+    that failed. If backend is given the output of each simulation is
+    written to its logs, see simulate.
+    """
+    failed = []
+    for index in indices:
+        try:
+            simulate(simulation_function, index, save, backend)
+        except Exception:
+            if not backend:
+                # otherwise in the error log of the simulation already
+                traceback.print_exc()
+            failed.append(index)
+    return failed
+
+
+def simulate_chunk(
+    simulation_function: Callable,
+    chunk: int,
+    number_of_chunks: int,
+    save: Callable,
+    backend: Optional[str] = None,
+):
+    """
+    Execute a contiguous block of simulations, the chunk:th out of
+    number_of_chunks, in a single interpreter.
+    """
+    indices = _chunk_indices(chunk, number_of_chunks, _number_of_tasks())
+    logger.info(
+        f"chunk {chunk}/{number_of_chunks}: simulations {indices.start}-{indices.stop - 1}"
+    )
+    failed = _simulate_indices(simulation_function, indices, save, backend)
+    if failed:
+        raise Exception(f"simulations {failed} of chunk {chunk} failed")
 
 
 def _local(number_of_simulations: int):
 
     configuration_file_name = "local_simulation.sh"
 
-    error_folder = os.path.join('local', "err")
-    output_folder = os.path.join('local', "out")
-
-    _create_folder_if_does_not_exists('local')
-    _create_folder_if_does_not_exists(error_folder)
-    _create_folder_if_does_not_exists(output_folder)
+    output_folder, error_folder = _backend_folders('local')
+    number_of_jobs = _number_of_jobs(number_of_simulations)
 
     return [
         _bash_script(
             configuration_file_name,
             [
-                {
-                    "command": " ".join(
-                        [
-                            "time",
-                            f"{simset.python_interpreter}",
-                            f"{simset.script_name}",
-                            "simulate",
-                            "execute",
-                            "-i",
-                            f"{index}",
-                            "1>",
-                            os.path.join(output_folder, f"{index}.out"),
-                            "2>",
-                            os.path.join(error_folder, f"{index}.err"),
-                        ]
-                    ),
-                    "description": "execute on local",
-                }
-                for index in range(1, number_of_simulations + 1)
+                threads.export_command(threads.threads_per_job(1)),
+                *[
+                    {
+                        "command": " ".join(
+                            [
+                                "time",
+                                f"{simset.python_interpreter}",
+                                f"{simset.script_name}",
+                                "simulate",
+                                "execute",
+                                *_execute_arguments(
+                                    f"{index}", number_of_jobs, 'local'
+                                ),
+                                "1>",
+                                os.path.join(output_folder, f"{index}.out"),
+                                "2>",
+                                os.path.join(error_folder, f"{index}.err"),
+                            ]
+                        ),
+                        "description": "execute on local",
+                    }
+                    for index in range(1, number_of_jobs + 1)
+                ],
             ],
             description="local simulation",
         )
@@ -253,41 +703,44 @@ def _parallel(number_of_simulations: int):
 
     configuration_file_name = "parallel_simulation"
 
-    error_folder = os.path.join('parallel', "err")
-    output_folder = os.path.join('parallel', "out")
-
-    _create_folder_if_does_not_exists('parallel')
-    _create_folder_if_does_not_exists(error_folder)
-    _create_folder_if_does_not_exists(output_folder)
+    output_folder, error_folder = _backend_folders('parallel')
+    number_of_jobs = _number_of_jobs(number_of_simulations)
+    memory_arguments = []
+    if simset.memory_admission:
+        # only start another job while this much memory is free, note that
+        # gnu parallel kills the youngest job when less than half of it is
+        memory_arguments.append(f"--memfree {int(task_memory_requirement())}M")
+    # gnu parallel's job slot number, recorded in the ledger for traces and
+    # used to pin each job to its cores if simset.cpu_affinity is set
+    slot_arguments = ["--slot", "{%}"]
 
     return [
         _bash_script(
             configuration_file_name,
             [
+                threads.export_command(threads.threads_per_job(simset.concurrent_jobs)),
                 {
                     "command": " ".join(
                         [
                             "parallel",
                             f"--jobs {simset.concurrent_jobs}",
+                            *memory_arguments,
                             f'"{simset.python_interpreter}',
                             f"{simset.script_name}",
                             "simulate",
                             "execute",
-                            "-i",
-                            "{}",
+                            *_execute_arguments("{}", number_of_jobs, 'parallel'),
+                            *slot_arguments,
                             "1>",
                             os.path.join(output_folder, "{}.out"),
                             "2>",
                             os.path.join(error_folder, '{}.err"'),
                             ":::",
-                            *[
-                                str(index)
-                                for index in range(1, number_of_simulations + 1)
-                            ],
+                            *[str(index) for index in range(1, number_of_jobs + 1)],
                         ]
                     ),
                     "description": "execute using gnu parallel command",
-                }
+                },
             ],
             description="local simulation",
         )
@@ -308,22 +761,58 @@ def _remote_parallel(number_of_simulations: int, remote: str):
     ]
 
 
+def _remote_dispatch(number_of_simulations: int, remotes: List[str]):
+
+    configuration_file_name = "remote_dispatch_simulation"
+
+    _backend_folders('remote')
+
+    command_list = [
+        _upload(f'upload_{remote}', remote, description=f"copy code to {remote}")
+        for remote in remotes
+    ]
+    command_list.append(
+        {
+            "command": " ".join(
+                [
+                    f"{simset.python_interpreter}",
+                    f"{simset.script_name}",
+                    "simulate",
+                    "dispatch",
+                    *remotes,
+                ]
+            ),
+            "description": f"dispatch {number_of_simulations} simulations across hosts",
+        }
+    )
+    command_list += [
+        _download(
+            f'download_{remote}', remote, description=f"copy new results from {remote}"
+        )
+        for remote in remotes
+    ]
+
+    return [
+        _bash_script(
+            configuration_file_name,
+            command_list,
+            description="remote dispatch simulation",
+        )
+    ]
+
+
 def _euler(number_of_simulations: int):
 
     configuration_file_name = "euler_simulation"
 
-    error_folder = os.path.join('euler', "err")
-    output_folder = os.path.join('euler', "out")
-
-    _create_folder_if_does_not_exists('euler')
-    _create_folder_if_does_not_exists(error_folder)
-    _create_folder_if_does_not_exists(output_folder)
+    output_folder, error_folder = _backend_folders('euler')
+    number_of_jobs = _number_of_jobs(number_of_simulations)
 
     output_file_name = os.path.join(output_folder, "%I.out")
     error_file_name = os.path.join(error_folder, "%I.err")
 
     euler_command = [
-        f'bsub -J "{os.path.basename(os.getcwd())}[1-{number_of_simulations}]"',
+        f'bsub -J "{os.path.basename(os.getcwd())}[1-{number_of_jobs}]"',
         f'-oo "{output_file_name}"',
         f'-eo "{error_file_name}"',
         f'-R "rusage[mem={simset.memory_requirement}]"',
@@ -341,8 +830,12 @@ def _euler(number_of_simulations: int):
             f"-W {simset.euler_wall_time['hours']}:{simset.euler_wall_time['minutes']}"
         )
 
+    execute_arguments = " ".join(
+        _execute_arguments("\\$LSB_JOBINDEX", number_of_jobs, 'euler')
+    )
+    thread_limits = " ".join(threads.env_prefix(simset.euler_number_of_cores or 1))
     euler_command.append(
-        f'"{simset.python_interpreter} {simset.script_name} simulate execute -i \$LSB_JOBINDEX"'
+        f'"{thread_limits} {simset.python_interpreter} {simset.script_name} simulate execute {execute_arguments}"'
     )
 
     return [
@@ -379,10 +872,10 @@ def _condor_submit(number_of_simulations: int):
 
     configuration_file_name = os.path.join('condor', 'configuration.condor')
 
-    _create_folder_if_does_not_exists('condor')
-    _create_folder_if_does_not_exists('condor/log')
-    _create_folder_if_does_not_exists('condor/err')
-    _create_folder_if_does_not_exists('condor/out')
+    output_folder, error_folder = _backend_folders('condor')
+    number_of_jobs = _number_of_jobs(number_of_simulations)
+    # condor processes count from 0 and are passed as the first argument
+    execute_arguments = _execute_arguments("$((${1} + 1))", number_of_jobs, 'condor')
 
     # condor script
 
@@ -430,8 +923,7 @@ def _condor_submit(number_of_simulations: int):
                         f"{simset.script_name}",
                         "simulate",
                         "execute",
-                        "-i",
-                        "$(Process)",
+                        *execute_arguments,
                     ]
                 ),
             }
@@ -440,7 +932,9 @@ def _condor_submit(number_of_simulations: int):
     )
 
     # Create the simset_setup file
-    template = env.get_template('configuration.condor.j2')
+    template = _environment().get_template('configuration.condor.j2')
+    # condor allocates request_cpus cores to every job
+    condor_threads = int(simset.threads_per_job or 1)
 
     if os.path.exists(configuration_file_name):
         os.remove(configuration_file_name)
@@ -453,11 +947,16 @@ def _condor_submit(number_of_simulations: int):
                     "executable": command['command'][2:],
                     "arguments": "$(Process)",
                     "condor_log_folder": "condor/log",
-                    "condor_out_folder": "condor/out",
-                    "condor_err_folder": "condor/err",
-                    "number_of_simulations": str(int(number_of_simulations)),
+                    "condor_out_folder": output_folder,
+                    "condor_err_folder": error_folder,
+                    "number_of_simulations": str(int(number_of_jobs)),
                     "configuration_file_name": configuration_file_name,
                     "memory_requirement": simset.memory_requirement,
+                    "cpus": condor_threads,
+                    "environment": " ".join(
+                        f"{key}={value}"
+                        for key, value in threads.environment(condor_threads).items()
+                    ),
                 }
             )
         )
@@ -472,6 +971,33 @@ def _condor_submit(number_of_simulations: int):
     ]
 
 
+def _write_tasks() -> int:
+    """
+    check for unsimulated args combinations and store them as a task table,
+    longest expected runtime first if simset.longest_first is set.
+    """
+    if simset.longest_first:
+        tasks, durations = runtime_model.longest_first()
+        if durations is not None and _chunked():
+            # balance the expected duration of the chunks
+            number_of_jobs = _number_of_jobs(len(tasks))
+            capacities = [
+                len(_chunk_indices(chunk, number_of_jobs, len(tasks)))
+                for chunk in range(1, number_of_jobs + 1)
+            ]
+            order = runtime_model.pack(list(range(len(tasks))), durations, capacities)
+            tasks = [tasks[task] for task in order]
+        if durations is not None:
+            logger.debug(f"ordered {len(tasks)} simulations by expected runtime")
+    else:
+        tasks = _unsimulated_tasks()
+    _create_folder_if_does_not_exists(_tasks_folder)
+    number_of_simulations = write_task_table(tasks, _task_table_filename)
+    with TaskTable(_task_table_filename) as table:
+        _save_unsimulated_file([table.hash(i) for i in range(len(table))])
+    return number_of_simulations
+
+
 def simulate_setup(simulation_function: Callable, parser: argparse.Namespace):
     """
     Configure simulation setup by plattform.
@@ -479,12 +1005,13 @@ def simulate_setup(simulation_function: Callable, parser: argparse.Namespace):
     # check such that data folder exist
     simset._data_folder_exist()
 
-    # check for unsimulated args combinations
-    unsimulated = _get_unsimulated_args()
-    _save_unsimulated_file(unsimulated)
+    number_of_simulations = _write_tasks()
+    # claims of the previous task table, failed claims would block retries
+    from . import work_queue
+
+    work_queue.reset()
 
     # local execution
-    number_of_simulations = len(unsimulated)
     commands = []
     if parser.backend == "condor":
         commands += _condor(number_of_simulations)
@@ -494,8 +1021,10 @@ def simulate_setup(simulation_function: Callable, parser: argparse.Namespace):
         commands += _local(number_of_simulations)
     elif parser.backend == "parallel":
         commands += _parallel(number_of_simulations)
+    elif parser.backend == "remote" and len(parser.host) > 1:
+        commands += _remote_dispatch(number_of_simulations, parser.host)
     elif parser.backend == "remote":
-        commands += _remote_parallel(number_of_simulations, parser.host)
+        commands += _remote_parallel(number_of_simulations, parser.host[0])
     else:
         raise NotImplementedError
     for command in commands:
@@ -0,0 +1,92 @@
+import math
+from typing import Any, Dict, List, Tuple
+import simset
+
+# the ledger fields summarized, with their units
+fields = {
+    "time": "s",
+    "user": "s",
+    "sys": "s",
+    "max_rss": "MB",
+    "size": "B",
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """the nearest rank q:th percentile of values"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summary(values: List[float]) -> Dict[str, float]:
+    """count, mean, median, 90th and 99th percentile and maximum of values"""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+def finished() -> List[Tuple[Dict[str, Any], Dict]]:
+    """the (arguments by name, ledger record) pairs of the finished simulations"""
+    records = simset.ledger.records()
+    return [
+        (simset.post_processing._args_dict(args), records[item_hash])
+        for item_hash, args in simset._hash_to_args.items()
+        if item_hash in records
+    ]
+
+
+def overall(
+    simulations: List[Tuple[Dict[str, Any], Dict]],
+) -> Dict[str, Dict[str, float]]:
+    """the summary of every field over all simulations that recorded it"""
+    return {
+        field: summary([record[field] for _, record in simulations if field in record])
+        for field in fields
+    }
+
+
+def _key(value) -> Any:
+    """value if it can key a dict, which list arguments cannot, else its repr"""
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def by_axis(
+    simulations: List[Tuple[Dict[str, Any], Dict]], field: str = "time"
+) -> Dict[str, Dict[Any, Dict[str, float]]]:
+    """
+    the summary of a field per value of every argument axis, unhashable
+    values are keyed by their repr
+    """
+    values: Dict[str, Dict[Any, List[float]]] = {}
+    for args, record in simulations:
+        if field not in record:
+            continue
+        for name, value in args.items():
+            axis = values.setdefault(name, {})
+            axis.setdefault(_key(value), []).append(record[field])
+    return {
+        name: {value: summary(samples) for value, samples in axis.items()}
+        for name, axis in values.items()
+    }
+
+
+def slowest(
+    simulations: List[Tuple[Dict[str, Any], Dict]], number: int = 5
+) -> List[Tuple[Dict[str, Any], Dict]]:
+    """the number slowest simulations by wall time"""
+    timed = [simulation for simulation in simulations if "time" in simulation[1]]
+    return sorted(timed, key=lambda simulation: simulation[1]["time"], reverse=True)[
+        :number
+    ]
@@ -0,0 +1,234 @@
+import contextlib
+import os
+import socket
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import simset
+from . import compress, threads
+
+_packs_folder = "packs"
+# the folder of the data folder holding what was downloaded from each remote
+_sync_folder = "sync"
+
+# hash -> (shard filename, offset, length), the index of this process
+_index: Dict[str, Tuple[str, int, int]] = {}
+# hash -> time the indexed copy was written, in ns
+_index_times: Dict[str, int] = {}
+# shard index filename -> number of bytes of it already read into _index
+_index_offsets: Dict[str, int] = {}
+
+
+def _packed() -> bool:
+    if simset.result_store not in ("files", "packed"):
+        raise Exception(f"unknown result store: {simset.result_store}")
+    return simset.result_store == "packed"
+
+
+def packs_folder() -> str:
+    "return the absolute path of the pack folder"
+    return os.path.join(simset.data_folder, _packs_folder)
+
+
+def _shard() -> str:
+    """
+    the pack file this process appends to, named after the host and the job
+    slot, or the process if it runs in none. Slots are unique among the
+    processes running on a host at a time, so no two writers share a pack.
+    """
+    slot = threads.current_slot()
+    writer = f"pid{os.getpid()}" if slot is None else f"slot{slot}"
+    return os.path.join(packs_folder(), f"{socket.gethostname()}-{writer}.pack")
+
+
+@contextlib.contextmanager
+def _temporary_filename() -> Iterator[str]:
+    # kept out of the data folder itself so its mtime keeps tracking results
+    os.makedirs(packs_folder(), exist_ok=True)
+    fd, filename = tempfile.mkstemp(prefix=".tmp-", dir=packs_folder())
+    os.close(fd)
+    try:
+        yield filename
+    finally:
+        os.remove(filename)
+
+
+def write_result(item_hash: str, res, save: Callable) -> int:
+    """
+    Store a result through the user save function.
+
+    With simset.result_store = "files" every result is its own file in the
+    data folder. With "packed" the saved bytes are appended to the pack
+    file of the writing process, see _shard, and their offset and length to
+    the pack's .idx file. As every pack has a single writer no locks are
+    needed, which cluster filesystems often do not support reliably.
+
+    If simset.compression is set the saved bytes are compressed right away,
+    on the worker, see simset.compress.
+
+    Returns
+    -------
+    the number of bytes stored.
+    """
+    # fail on an unknown codec before anything is written
+    compress.codec()
+    if not _packed():
+        full_filename = simset.data_path(item_hash)
+        # delete if target file exists
+        if os.path.exists(full_filename):
+            os.remove(full_filename)
+        save(res, full_filename)
+        compress.compress_file(full_filename)
+        # set default permission to read only
+        os.chmod(full_filename, 0o440)
+        return os.path.getsize(full_filename)
+
+    with _temporary_filename() as filename:
+        save(res, filename)
+        compress.compress_file(filename)
+        with open(filename, "rb") as f:
+            data = f.read()
+    pack_filename = _shard()
+    with open(pack_filename, "ab") as pack:
+        offset = pack.seek(0, os.SEEK_END)
+        pack.write(data)
+    # only once the bytes are in the pack, readers may find them
+    with open(f"{pack_filename[:-5]}.idx", "ab") as index:
+        index.write(f"{item_hash} {offset} {len(data)} {time.time_ns()}\n".encode())
+    return len(data)
+
+
+def _pack_folders() -> List[str]:
+    """the local packs folder and the packs downloaded from every remote"""
+    folders = [packs_folder()]
+    sync_folder = os.path.join(simset.data_folder, _sync_folder)
+    if os.path.exists(sync_folder):
+        with os.scandir(sync_folder) as entries:
+            folders += [
+                os.path.join(entry.path, _packs_folder)
+                for entry in entries
+                if entry.is_dir()
+            ]
+    return folders
+
+
+def _index_files() -> Iterator[str]:
+    for folder in _pack_folders():
+        if not os.path.exists(folder):
+            continue
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.endswith(".idx"):
+                    yield entry.path
+
+
+def _update_index():
+    """
+    read the index entries appended since the last update. A result written
+    again, possibly by another writer, is read from its latest copy.
+    """
+    for index_filename in _index_files():
+        pack_filename = f"{index_filename[:-4]}.pack"
+        with open(index_filename, "rb") as f:
+            f.seek(_index_offsets.get(index_filename, 0))
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # an entry still being written
+                    break
+                item_hash, offset, length, written = line.split()
+                item_hash, written = item_hash.decode(), int(written)
+                if written >= _index_times.get(item_hash, 0):
+                    _index[item_hash] = (pack_filename, int(offset), int(length))
+                    _index_times[item_hash] = written
+                _index_offsets[index_filename] = f.tell()
+
+
+def _lookup(item_hash: str) -> Tuple[str, int, int]:
+    if item_hash not in _index:
+        _update_index()
+    return _index[item_hash]
+
+
+def _is_packed(item_hash: str) -> bool:
+    """
+    whether to read a result from the packs, which holds for packed results
+    unless the data folder has a result file and the store is "files".
+    Either store can thus read results written by the other.
+    """
+    if not _packed() and os.path.exists(simset.data_path(item_hash)):
+        return False
+    try:
+        _lookup(item_hash)
+    except KeyError:
+        return False
+    return True
+
+
+def packed_hashes() -> Iterator[str]:
+    """the hashes of all packed results"""
+    _update_index()
+    return iter(list(_index))
+
+
+def newest_index_mtime() -> int:
+    """the latest modification time of any pack index, in ns"""
+    return max(
+        (os.stat(filename).st_mtime_ns for filename in _index_files()), default=0
+    )
+
+
+def read_bytes(item_hash: str) -> bytes:
+    """random access to the stored bytes of a result"""
+    if not _is_packed(item_hash):
+        with open(simset.data_path(item_hash), "rb") as f:
+            return f.read()
+    pack_filename, offset, length = _lookup(item_hash)
+    with open(pack_filename, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+@contextlib.contextmanager
+def result_filename(item_hash: str) -> Iterator[str]:
+    """
+    a filename holding the result which the user load function can read,
+    the result file itself or a temporary copy of the packed bytes.
+    """
+    if not _is_packed(item_hash):
+        yield simset.data_path(item_hash)
+        return
+    with _temporary_filename() as filename:
+        with open(filename, "wb") as f:
+            f.write(read_bytes(item_hash))
+        yield filename
+
+
+def _location(item_hash: str) -> Tuple[str, int, Optional[int]]:
+    """the file, offset and length, None to the end, of a stored result"""
+    if not _is_packed(item_hash):
+        return simset.data_path(item_hash), 0, None
+    return _lookup(item_hash)
+
+
+def load_result(item_hash: str, load: Callable):
+    """
+    load a stored result through the user load function. Load functions
+    with an accepts_offset attribute, like simset.arrays.load, read packed
+    results in place instead of from a temporary copy. Compressed results
+    are decompressed into a temporary file first.
+    """
+    filename, offset, length = _location(item_hash)
+    if compress.compressed_codec(filename, offset) is not None:
+        with compress.decompressed(filename, offset, length) as decompressed:
+            return load(decompressed)
+    if getattr(load, "accepts_offset", False) and _is_packed(item_hash):
+        return load(filename, offset=offset)
+    with result_filename(item_hash) as filename:
+        return load(filename)
+
+
+def result_size(item_hash: str) -> int:
+    """the number of bytes a result occupies"""
+    if not _is_packed(item_hash):
+        return os.path.getsize(simset.data_path(item_hash))
+    return _lookup(item_hash)[2]
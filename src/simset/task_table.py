@@ -0,0 +1,97 @@
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+from typing import Iterable, Tuple
+
+_magic = b"SIMSETTT"
+_version = 1
+# magic, version, number of tasks
+_header = struct.Struct("<8sIQ")
+# sha256 digest, payload offset, payload length
+_record = struct.Struct("<32sQI")
+
+
+def write_task_table(tasks: Iterable[Tuple[str, Tuple]], filename: str) -> int:
+    """
+    Write a fixed-width binary task table.
+
+    Parameters
+    ----------
+    tasks: iterable of (hash, argument tuple)
+        the tasks in execution order, task index 1 is the first item.
+    filename: `str`
+        the table file, replaced atomically.
+
+    Returns
+    -------
+    the number of tasks written.
+    """
+    records = bytearray()
+    number_of_tasks = 0
+    offset = 0
+    with tempfile.TemporaryFile() as payload:
+        for item_hash, args in tasks:
+            data = pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL)
+            records += _record.pack(bytes.fromhex(item_hash), offset, len(data))
+            payload.write(data)
+            offset += len(data)
+            number_of_tasks += 1
+        payload.seek(0)
+        temporary_filename = f"{filename}.{os.getpid()}.tmp"
+        with open(temporary_filename, "wb") as f:
+            f.write(_header.pack(_magic, _version, number_of_tasks))
+            f.write(records)
+            shutil.copyfileobj(payload, f)
+    os.chmod(temporary_filename, 0o660)
+    os.replace(temporary_filename, filename)
+    return number_of_tasks
+
+
+class TaskTable:
+    """
+    Random access to a task table written by write_task_table.
+
+    The file is memory mapped so looking up a task costs the same
+    regardless of the number of tasks.
+    """
+
+    def __init__(self, filename: str):
+        with open(filename, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._length = _header.unpack_from(self._mmap, 0)
+        if magic != _magic or version != _version:
+            raise Exception(f"{filename} is not a simset task table")
+        self._payload_offset = _header.size + self._length * _record.size
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _record(self, index: int):
+        if not 0 <= index < self._length:
+            raise IndexError(f"task {index} out of range for {self._length} tasks")
+        return _record.unpack_from(self._mmap, _header.size + index * _record.size)
+
+    def hash(self, index: int) -> str:
+        """return the hash of the task at (zero based) index"""
+        return self._record(index)[0].hex()
+
+    def __getitem__(self, index: int) -> Tuple[str, Tuple]:
+        digest, offset, length = self._record(index)
+        start = self._payload_offset + offset
+        return digest.hex(), pickle.loads(self._mmap[start : start + length])
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
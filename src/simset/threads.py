@@ -0,0 +1,87 @@
+import logging
+import os
+from typing import Dict, List, Optional
+import simset
+
+logger = logging.getLogger(__name__)
+
+# environment variables read by the common BLAS and OpenMP runtimes
+_thread_variables = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
+# the job slot passed to pin
+_current_slot: Optional[int] = None
+
+
+def threads_per_job(concurrent_jobs: int) -> int:
+    """
+    the number of threads each job may use, simset.threads_per_job if set,
+    otherwise the cores divided evenly between the concurrent jobs.
+    """
+    if simset.threads_per_job:
+        return int(simset.threads_per_job)
+    return max(1, (os.cpu_count() or 1) // max(1, concurrent_jobs))
+
+
+def environment(threads: int) -> Dict[str, str]:
+    """the environment variables limiting a job to threads threads"""
+    return {variable: str(threads) for variable in _thread_variables}
+
+
+def export_command(threads: int) -> Dict[str, str]:
+    """a bash script command exporting the thread limits"""
+    return {
+        "command": "export "
+        + " ".join(f"{key}={value}" for key, value in environment(threads).items()),
+        "description": f"limit each simulation to {threads} threads",
+    }
+
+
+def env_prefix(threads: int) -> List[str]:
+    """an env command prefix setting the thread limits"""
+    return ["env", *[f"{key}={value}" for key, value in environment(threads).items()]]
+
+
+def limit_threads(threads: int):
+    """
+    limit the threads of this process, including native thread pools that
+    are already loaded if threadpoolctl is installed.
+    """
+    os.environ.update(environment(threads))
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(threads)
+
+
+def pin(slot: int, threads: int):
+    """
+    bind this process to its own threads cores if simset.cpu_affinity is
+    set, where slot is the zero based job slot.
+    """
+    global _current_slot
+    _current_slot = slot
+    if not simset.cpu_affinity or not hasattr(os, "sched_setaffinity"):
+        return
+    cores = sorted(os.sched_getaffinity(0))
+    start = (slot * threads) % len(cores)
+    selected = {cores[(start + offset) % len(cores)] for offset in range(threads)}
+    logger.debug(f"pinning job slot {slot} to cores {sorted(selected)}")
+    os.sched_setaffinity(0, selected)
+
+
+def current_slot() -> Optional[int]:
+    """the zero based job slot of this process, if it was pinned to one"""
+    return _current_slot
+
+
+def slot_threads() -> Optional[int]:
+    """the thread limit exported to this process, if any"""
+    value = os.environ.get(_thread_variables[0])
+    return int(value) if value and value.isdigit() else None
@@ -0,0 +1,117 @@
+import json
+from typing import Any, Dict, List, Tuple
+import simset
+
+
+def _microseconds(seconds: float) -> int:
+    return int(round(seconds * 1e6))
+
+
+def _slice(name: str, start: float, end: float, pid: int, tid: int, args: Dict = {}):
+    return {
+        "name": name,
+        "ph": "X",
+        "ts": _microseconds(start),
+        "dur": max(0, _microseconds(end) - _microseconds(start)),
+        "pid": pid,
+        "tid": tid,
+        "args": args,
+    }
+
+
+def _metadata(name: str, pid: int, tid: int, value: str):
+    return {"name": name, "ph": "M", "pid": pid, "tid": tid, "args": {"name": value}}
+
+
+def events() -> List[Dict[str, Any]]:
+    """
+    Chrome trace events of the recorded simulations.
+
+    Every host is a process of the trace and every job slot, or process if
+    its slot is unknown, a thread. A task is a slice split into load,
+    compute and save, failed tasks are slices named failed, and the time
+    from a process start to its first task is a startup slice.
+    """
+    records = simset.ledger.records()
+    failures = simset.ledger.failures()
+    arguments = {
+        item_hash: simset.post_processing._args_dict(args)
+        for item_hash, args in simset._hash_to_args.items()
+        if item_hash in records or item_hash in failures
+    }
+
+    hosts: Dict[str, int] = {}
+    lanes: Dict[Tuple[int, Any], int] = {}
+    # (host pid, lane) -> process id -> (process started, first task begun)
+    startups: Dict[Tuple[int, int], Dict[int, List[float]]] = {}
+    trace = []
+
+    def lane(record: Dict) -> Tuple[int, int]:
+        host = record.get("host", "unknown host")
+        if host not in hosts:
+            hosts[host] = len(hosts) + 1
+            trace.append(_metadata("process_name", hosts[host], 0, host))
+        pid = hosts[host]
+        slot = record.get("slot")
+        key = (pid, ("slot", slot) if slot is not None else ("pid", record.get("pid")))
+        if key not in lanes:
+            lanes[key] = len([k for k in lanes if k[0] == pid]) + 1
+            name = (
+                f"slot {slot + 1}" if slot is not None else f"pid {record.get('pid')}"
+            )
+            trace.append(_metadata("thread_name", pid, lanes[key], name))
+        return pid, lanes[key]
+
+    for item_hash, record in records.items():
+        if "started" not in record or "ended" not in record:
+            # recorded before timings were kept
+            continue
+        pid, tid = lane(record)
+        begun = record.get("begun", record["started"])
+        saved = record.get("saved", record["ended"])
+        args = {"hash": item_hash, **arguments.get(item_hash, {})}
+        trace.append(_slice("task", begun, saved, pid, tid, args))
+        trace.append(_slice("load", begun, record["started"], pid, tid))
+        trace.append(_slice("compute", record["started"], record["ended"], pid, tid))
+        trace.append(_slice("save", record["ended"], saved, pid, tid))
+        if "process_started" in record:
+            startup = startups.setdefault((pid, tid), {}).setdefault(
+                record.get("pid", 0), [record["process_started"], begun]
+            )
+            startup[1] = min(startup[1], begun)
+
+    for (pid, tid), processes in startups.items():
+        for process_started, first_begun in processes.values():
+            trace.append(_slice("startup", process_started, first_begun, pid, tid))
+
+    for item_hash, record in failures.items():
+        if "started" not in record:
+            continue
+        pid, tid = lane(record)
+        args = {
+            "hash": item_hash,
+            "error": record.get("error"),
+            **arguments.get(item_hash, {}),
+        }
+        trace.append(
+            _slice(
+                "failed",
+                record["started"],
+                record["started"] + record.get("time", 0),
+                pid,
+                tid,
+                args,
+            )
+        )
+    return trace
+
+
+def export(filename: str) -> int:
+    """
+    write the recorded simulations as a Chrome trace, viewable in Perfetto
+    or chrome://tracing, and return the number of events
+    """
+    trace = events()
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f, default=str)
+    return len(trace)
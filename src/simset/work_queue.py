@@ -0,0 +1,196 @@
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+from typing import Callable, Optional
+import simset
+from .simulate import (
+    _backend_folders,
+    _simulate_indices,
+    _task_table_filename,
+)
+from .task_table import TaskTable
+
+logger = logging.getLogger(__name__)
+
+_queue_folder = "queue"
+
+_claimed, _busy, _done = range(3)
+
+
+def _claims_folder() -> str:
+    return os.path.join(simset.data_folder, _queue_folder)
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _write_claim(path: str, content: str):
+    """atomically replace the content of a claim file"""
+    temporary_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+
+def _create_exclusive(path: str, content: str) -> bool:
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o660)
+    except FileExistsError:
+        return False
+    try:
+        os.write(fd, content.encode())
+    finally:
+        os.close(fd)
+    return True
+
+
+def _expired(path: str, lease: float) -> bool:
+    try:
+        return time.time() - os.stat(path).st_mtime > lease
+    except FileNotFoundError:
+        return True
+
+
+def _remove(path: str):
+    """remove a file another worker may have removed already"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _claim(item_hash: str, worker_id: str, lease: float) -> int:
+    """
+    Try to claim a task.
+
+    A claim is a file created with O_EXCL holding the id of its worker and
+    kept alive by touching it. Claims whose mtime is older than the lease
+    belong to dead workers and are taken over under a separate steal lock so
+    that only one worker can re-queue them.
+    """
+    path = os.path.join(_claims_folder(), f"{item_hash}.claim")
+    if _create_exclusive(path, worker_id):
+        return _claimed
+    try:
+        with open(path) as f:
+            if f.read().strip() in ("done", "failed"):
+                return _done
+    except FileNotFoundError:
+        return _busy
+    if not _expired(path, lease):
+        return _busy
+
+    steal_lock = f"{path}.steal"
+    if not _create_exclusive(steal_lock, worker_id):
+        if _expired(steal_lock, lease):
+            # the stealing worker died as well
+            _remove(steal_lock)
+        return _busy
+    try:
+        if not _expired(path, lease):
+            return _busy
+        logger.info(f"re-queueing expired task {item_hash}")
+        _write_claim(path, worker_id)
+        return _claimed
+    finally:
+        _remove(steal_lock)
+
+
+class _Heartbeat(threading.Thread):
+    """keep a claim alive by touching it while its task runs"""
+
+    def __init__(self, path: str, interval: float):
+        super().__init__(daemon=True)
+        self._path = path
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                os.utime(self._path)
+            except FileNotFoundError:
+                pass
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def reset():
+    """remove all claims, e.g. to retry failed tasks, simulate setup does too"""
+    if os.path.exists(_claims_folder()):
+        shutil.rmtree(_claims_folder())
+
+
+def work(
+    simulation_function: Callable,
+    save: Callable,
+    lease: Optional[float] = None,
+):
+    """
+    Drain the task table by repeatedly claiming the next pending task.
+
+    Any number of workers, on any host sharing the data folder, may run
+    this concurrently. Tasks held by workers that stopped heart beating for
+    longer than the lease are re-queued. Failed tasks keep their claim, so
+    later workers skip them until the claims are cleared by reset or by
+    simulate setup.
+
+    Parameters
+    ----------
+    simulation_function: (args) -> res
+        the simulation function.
+    save: (res, filename) -> None
+        the function storing results.
+    lease: `float`
+        seconds without a heartbeat after which a claim expires, defaults to
+        simset.queue_lease_time.
+    """
+    if lease is None:
+        lease = simset.queue_lease_time
+    simset._data_folder_exist()
+    os.makedirs(_claims_folder(), exist_ok=True)
+    _backend_folders(_queue_folder)
+    worker_id = _worker_id()
+
+    number_of_finished = 0
+    number_of_failed = 0
+    with TaskTable(_task_table_filename) as table:
+        while True:
+            waiting = False
+            finished = simset._get_simulated_arg_hashes()
+            for index in range(len(table)):
+                item_hash = table.hash(index)
+                if item_hash in finished:
+                    continue
+                state = _claim(item_hash, worker_id, lease)
+                if state == _busy:
+                    waiting = True
+                if state != _claimed:
+                    continue
+                path = os.path.join(_claims_folder(), f"{item_hash}.claim")
+                heartbeat = _Heartbeat(path, lease / 3)
+                heartbeat.start()
+                try:
+                    failed = _simulate_indices(
+                        simulation_function, [index + 1], save, _queue_folder
+                    )
+                finally:
+                    heartbeat.stop()
+                _write_claim(path, "failed" if failed else "done")
+                if failed:
+                    number_of_failed += 1
+                else:
+                    number_of_finished += 1
+            if not waiting:
+                break
+            # wait for tasks claimed by others to finish or expire
+            time.sleep(lease / 4)
+    logger.info(
+        f"worker {worker_id} finished {number_of_finished} simulations, {number_of_failed} failed"
+    )
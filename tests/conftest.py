@@ -0,0 +1,59 @@
+import pickle
+import pytest
+import simset
+from simset import store
+from simset.grid import Grid
+
+
+def _save(result, filename):
+    with open(filename, "wb") as f:
+        pickle.dump(result, f)
+
+
+def _load(filename):
+    with open(filename, "rb") as f:
+        return pickle.load(f)
+
+
+@pytest.fixture()
+def save():
+    """a user save function which pickles the result"""
+    return _save
+
+
+@pytest.fixture()
+def load():
+    """the user load function matching save"""
+    return _load
+
+
+@pytest.fixture()
+def data_folder(tmp_path, monkeypatch):
+    """an empty data folder in tmp_path, with a fresh index of the packed store"""
+    folder = tmp_path / ".data"
+    folder.mkdir()
+    monkeypatch.setattr(simset, "data_folder", str(folder))
+    monkeypatch.setattr(store, "_index", {})
+    monkeypatch.setattr(store, "_index_offsets", {})
+    monkeypatch.setattr(store, "_index_times", {})
+    return folder
+
+
+@pytest.fixture()
+def sweep(tmp_path, monkeypatch, data_folder):
+    """
+    run in tmp_path and return a function which sets up the grid of the given
+    axes, sorted as added rather than longest first
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(simset, "longest_first", False)
+
+    def setup(**axes) -> Grid:
+        grid = Grid()
+        for name, values in axes.items():
+            grid.add_axis(name, values)
+        monkeypatch.setattr(simset, "_grid", grid)
+        monkeypatch.setattr(simset, "_hash_to_args", grid.by_hash)
+        return grid
+
+    return setup
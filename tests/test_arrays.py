@@ -0,0 +1,63 @@
+import dataclasses
+import pytest
+from simset import arrays
+
+numpy = pytest.importorskip("numpy")
+
+
+@dataclasses.dataclass
+class _Result:
+    args: tuple
+    waveforms: dict
+    scalar: float
+
+
+def test_arrays_are_memory_mapped(tmp_path):
+    filename = str(tmp_path / "result.data")
+    result = _Result(
+        args=(1, 2),
+        waveforms={
+            "c": numpy.arange(12, dtype=numpy.float32).reshape(3, 4),
+            "f": numpy.asfortranarray(numpy.arange(6.0).reshape(2, 3)),
+            "strided": numpy.arange(20, dtype=numpy.int16)[::3],
+            "complex": numpy.array(1 + 2j),
+            "empty": numpy.zeros(0),
+            "objects": numpy.array([None, "a"], dtype=object),
+        },
+        scalar=1.5,
+    )
+    arrays.save(result, filename)
+
+    for mmap in (True, False):
+        loaded = arrays.load(filename, mmap=mmap)
+        assert loaded.args == (1, 2) and loaded.scalar == 1.5
+        for key, value in result.waveforms.items():
+            assert loaded.waveforms[key].dtype == value.dtype
+            numpy.testing.assert_array_equal(loaded.waveforms[key], value)
+        assert isinstance(loaded.waveforms["c"], numpy.memmap) == mmap
+
+
+def test_load_at_offset(tmp_path):
+    single = str(tmp_path / "single.data")
+    arrays.save({"x": numpy.arange(5)}, single)
+    packed = tmp_path / "packed.data"
+    packed.write_bytes(b"123" + open(single, "rb").read())
+    loaded = arrays.load(str(packed), offset=3)
+    numpy.testing.assert_array_equal(loaded["x"], numpy.arange(5))
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_structured_arrays_keep_their_fields(tmp_path, mmap):
+    filename = str(tmp_path / "result.data")
+    dtype = numpy.dtype([("x", "<f8"), ("n", "<i4"), ("v", "<f4", (2,))], align=True)
+    records = numpy.zeros(3, dtype=dtype)
+    records["x"] = [1.0, 2.0, 3.0]
+    records["n"] = [4, 5, 6]
+    records["v"] = [[1, 2], [3, 4], [5, 6]]
+    arrays.save({"records": records}, filename)
+
+    loaded = arrays.load(filename, mmap=mmap)["records"]
+    assert loaded.dtype == dtype
+    assert loaded.dtype.names == ("x", "n", "v")
+    assert loaded["n"].tolist() == [4, 5, 6]
+    assert numpy.array_equal(loaded["v"], records["v"])
@@ -0,0 +1,65 @@
+import pytest
+import simset
+from simset.simulate import (
+    _chunk_indices,
+    _execute_arguments,
+    _number_of_jobs,
+    _write_tasks,
+    simulate_chunk,
+)
+
+
+@pytest.mark.parametrize("number_of_simulations", [1, 7, 10, 23])
+@pytest.mark.parametrize("tasks_per_job", [1, 3, 10])
+def test_chunks_partition_the_tasks(monkeypatch, number_of_simulations, tasks_per_job):
+    monkeypatch.setattr(simset, "tasks_per_job", tasks_per_job)
+    number_of_chunks = _number_of_jobs(number_of_simulations)
+    chunks = [
+        list(_chunk_indices(chunk, number_of_chunks, number_of_simulations))
+        for chunk in range(1, number_of_chunks + 1)
+    ]
+    indices = [index for chunk in chunks for index in chunk]
+    assert indices == list(range(1, number_of_simulations + 1))
+    assert all(0 < len(chunk) <= tasks_per_job for chunk in chunks)
+    with pytest.raises(Exception):
+        _chunk_indices(number_of_chunks + 1, number_of_chunks, number_of_simulations)
+
+
+def test_execute_arguments(monkeypatch):
+    monkeypatch.setattr(simset, "tasks_per_job", 1)
+    assert _execute_arguments("3", 5, "local") == ["-i", "3", "--backend", "local"]
+    monkeypatch.setattr(simset, "tasks_per_job", 4)
+    assert _execute_arguments("3", 5, "local") == [
+        "--chunk",
+        "3",
+        "--of",
+        "5",
+        "--backend",
+        "local",
+    ]
+
+
+def test_simulate_chunk_runs_its_slice(sweep, save):
+    sweep(a=list(range(7)))
+    _write_tasks()
+
+    simulate_chunk(lambda a: a, 2, 3, save)
+    assert sorted(record["index"] for record in simset.ledger.records().values()) == [
+        4,
+        5,
+        6,
+    ]
+
+
+@pytest.mark.parametrize("tasks_per_job", [1, 3])
+def test_condor_jobs_count_from_one(sweep, monkeypatch, tasks_per_job):
+    pytest.importorskip("jinja2")
+    from simset.simulate import _condor_submit
+
+    sweep(a=list(range(7)))
+    monkeypatch.setattr(simset, "tasks_per_job", tasks_per_job)
+    _condor_submit(7)
+    with open("bash_scripts/condor_executable.sh") as f:
+        script = f.read()
+    # the 0 based condor process number is passed as the first argument
+    assert " $((${1} + 1)) " in script and "$(Process)" not in script
@@ -0,0 +1,39 @@
+import pytest
+import simset
+from simset import compress, store
+
+
+@pytest.fixture(params=["files", "packed"])
+def data_folder(request, data_folder, monkeypatch):
+    monkeypatch.setattr(simset, "result_store", request.param)
+    return data_folder
+
+
+@pytest.mark.parametrize("codec,level", [("zlib", 1), ("lzma", None), ("bz2", 5)])
+def test_compressed_results_load_transparently(
+    data_folder, save, load, monkeypatch, codec, level
+):
+    result = {"samples": [0.0] * 10000, "label": codec}
+    plain = simset.hash_to_filename("plain")
+    store.write_result(plain, result, save)
+
+    monkeypatch.setattr(simset, "compression", codec)
+    monkeypatch.setattr(simset, "compression_level", level)
+    packed = simset.hash_to_filename("compressed")
+    size = store.write_result(packed, result, save)
+
+    assert store.result_size(packed) == size < store.result_size(plain) / 10
+    assert compress.compressed_codec(*store._location(packed)[:2]) == codec
+    assert compress.compressed_codec(*store._location(plain)[:2]) is None
+    # the codec is read from the header, not from the settings
+    monkeypatch.setattr(simset, "compression", None)
+    assert store.load_result(packed, load) == result
+    assert store.load_result(plain, load) == result
+    # decompressed next to the results and removed again
+    assert list((data_folder / "tmp").iterdir()) == []
+
+
+def test_unknown_codec(data_folder, save, monkeypatch):
+    monkeypatch.setattr(simset, "compression", "zip")
+    with pytest.raises(Exception):
+        store.write_result(simset.hash_to_filename("x"), 1, save)
@@ -0,0 +1,42 @@
+import simset
+from simset.dispatch import Dispatcher
+
+# a local stand-in for ssh where the host named 'down' refuses connections
+_shell = ["sh", "-c", "test {host} != down || exit 255; {command}"]
+
+
+def _touch(folder):
+    return lambda index: f"touch {folder}/{index}"
+
+
+def test_dispatch_across_hosts(tmp_path):
+    dispatcher = Dispatcher({"hostA": 2, "hostB": 3}, _touch(tmp_path), _shell)
+    assert dispatcher.run(range(1, 21)) == []
+    assert sorted(dispatcher.finished_tasks) == list(range(1, 21))
+    assert sorted(int(f.name) for f in tmp_path.iterdir()) == list(range(1, 21))
+
+
+def test_failed_host_is_reassigned(tmp_path):
+    dispatcher = Dispatcher({"down": 2, "hostA": 1}, _touch(tmp_path), _shell)
+    assert dispatcher.run(range(1, 11)) == []
+    assert dispatcher.failed_hosts == ["down"]
+    assert sorted(dispatcher.finished_tasks) == list(range(1, 11))
+
+
+def test_failed_tasks_and_unassigned(tmp_path):
+    dispatcher = Dispatcher({"hostA": 2}, lambda index: f"exit {index % 2}", _shell)
+    assert dispatcher.run(range(1, 5)) == []
+    assert sorted(dispatcher.failed_tasks) == [1, 3]
+
+    dispatcher = Dispatcher({"down": 2}, _touch(tmp_path), _shell)
+    assert sorted(dispatcher.run(range(1, 5))) == [1, 2, 3, 4]
+
+
+def test_default_shell_shares_connections(monkeypatch):
+    monkeypatch.setattr(simset, "ssh_multiplexing", True)
+    argv = Dispatcher({"hostA": 1}, str)._argv("hostA", 3)
+    assert argv[0] == "ssh" and argv[-2:] == ["hostA", "3"]
+    assert "ControlMaster=auto" in argv
+
+    monkeypatch.setattr(simset, "ssh_multiplexing", False)
+    assert Dispatcher({"hostA": 1}, str)._argv("hostA", 3) == ["ssh", "hostA", "3"]
@@ -0,0 +1,139 @@
+import dataclasses
+import os
+import pytest
+import simset
+from simset import gather
+
+
+@dataclasses.dataclass
+class _Result:
+    value: int
+    label: str
+
+
+@pytest.fixture()
+def grid(sweep):
+    return sweep(a=[1, 2], b=[3, 4, 5])
+
+
+def _simulate(grid, save, indices, offset=0):
+    for index in indices:
+        args = grid[index]
+        item_hash = simset.hash_to_filename(args)
+        a, b = args[1][::-1]
+        simset.store.write_result(item_hash, _Result(a * b + offset, f"{a}"), save)
+        simset.ledger.record(item_hash, {"offset": offset})
+
+
+def _processed(load):
+    processed = []
+    simset.post_processing.post_processing(
+        lambda results: processed.extend(results), load
+    )
+    return processed
+
+
+def test_gather_is_incremental(grid, save, load, monkeypatch):
+    _simulate(grid, save, range(4))
+    assert not gather.up_to_date(simset._get_simulated_args())
+    assert gather.gather(load) == 4
+    assert gather.gather(load) == 0
+    assert gather.up_to_date(simset._get_simulated_args())
+
+    _simulate(grid, save, range(4, 6))
+    assert not gather.up_to_date(simset._get_simulated_args())
+    assert gather.gather(load) == 2
+    # a simulation run again is gathered again
+    _simulate(grid, save, [0], offset=100)
+    assert gather.gather(load) == 1
+
+    # process reads the consolidated file instead of the results
+    monkeypatch.setattr(simset.store, "load_result", None)
+    assert (
+        _processed(load)
+        == [_Result(3 + 100, "1")]
+        + [_Result(a * b, f"{a}") for a in (1, 2) for b in (3, 4, 5)][1:]
+    )
+
+    columns = gather.table(stack=True)
+    assert sorted(zip(columns["a"], columns["b"], columns["value"])) == sorted(
+        [(1, 3, 103), (1, 4, 4), (1, 5, 5), (2, 3, 6), (2, 4, 8), (2, 5, 10)]
+    )
+    assert columns["label"][0] in ("1", "2")
+
+
+class _Derived:
+    def __init__(self, raw):
+        self.values = [raw, raw * 2]
+
+
+def test_gather_compacts_superseded_rows(grid, save, load, monkeypatch):
+    monkeypatch.setattr(gather, "_segment_rows", 2)
+    _simulate(grid, save, range(6))
+    assert gather.gather(load) == 6
+    size = os.path.getsize(gather.gathered_filename())
+    for offset in [1, 2, 3]:
+        _simulate(grid, save, range(6), offset=offset)
+        assert gather.gather(load) == 6
+    # every gather superseded all rows, so the file was compacted each time
+    assert os.path.getsize(gather.gathered_filename()) < 2 * size
+    gather._rows()
+    assert sum(len(segment["hashes"]) for segment in gather._cache["segments"]) == 6
+
+    monkeypatch.setattr(simset.store, "load_result", None)
+    assert _processed(load) == [
+        _Result(a * b + 3, f"{a}") for a in (1, 2) for b in (3, 4, 5)
+    ]
+
+
+def test_objects_are_rebuilt_like_pickle_does():
+    result = _Derived(2)
+    # set by simulate, not taken by the constructor
+    result.time = {"time": 1.0}
+    kind, fields = gather._split(result)
+    joined = gather._join(kind, fields)
+    assert type(joined) is _Derived
+    assert vars(joined) == {"values": [2, 4], "time": {"time": 1.0}}
+    # objects pickled through their own state are kept whole
+    assert gather._split(_Stateful(3))[0] == (gather._value, None)
+
+
+class _Stateful:
+    def __init__(self, value):
+        self.value = value
+
+    def __getstate__(self):
+        return {"doubled": 2 * self.value}
+
+    def __setstate__(self, state):
+        self.value = state["doubled"] // 2
+
+
+def test_arrays_are_mapped_from_the_gathered_file(sweep, save, load):
+    numpy = pytest.importorskip("numpy")
+    grid = sweep(a=[1, 2, 3])
+    for args in grid:
+        a = args[1][0]
+        item_hash = simset.hash_to_filename(args)
+        result = {
+            "c": numpy.full((a, 3), a, dtype=numpy.float32),
+            "f": numpy.asfortranarray(numpy.arange(6.0 * a).reshape(2, 3 * a)),
+            "label": str(a),
+        }
+        simset.store.write_result(item_hash, result, save)
+        simset.ledger.record(item_hash)
+    assert gather.gather(load) == 3
+
+    rows = gather._rows()
+    for args in grid:
+        a = args[1][0]
+        segment, row = rows[simset.hash_to_filename(args)]
+        fields = gather._fields(segment, row)
+        assert fields["label"] == str(a)
+        assert fields["c"].shape == (a, 3) and (fields["c"] == a).all()
+        assert fields["f"].flags.f_contiguous
+        assert (fields["f"] == numpy.arange(6.0 * a).reshape(2, 3 * a)).all()
+        # backed by the mapped file and aligned within it
+        assert not fields["c"].flags.owndata
+        assert fields["c"].ctypes.data % gather._alignment == 0
+        assert not fields["c"].flags.writeable
@@ -0,0 +1,54 @@
+import itertools
+import simset
+from simset.grid import Grid
+
+
+def _eager_product(axes):
+    """the argument tuples as the previous eager implementation built them"""
+    arguments_list = []
+    for name, values in axes:
+        if arguments_list:
+            arguments_list = [
+                ((name, *old[0]), (value, *old[1]))
+                for old in arguments_list
+                for value in values
+            ]
+        else:
+            arguments_list = [((name,), (value,)) for value in values]
+    return arguments_list
+
+
+def _grid(axes):
+    grid = Grid()
+    for name, values in axes:
+        grid.add_axis(name, values)
+    return grid
+
+
+def test_grid_matches_eager_product():
+    axes = [('arg1', [1, 2, 3]), ('arg2', ['a', 'b']), ('arg3', [0.5, None, (1, 2)])]
+    grid = _grid(axes)
+    expected = _eager_product(axes)
+    assert len(grid) == len(expected)
+    assert list(grid) == expected
+    assert [grid[index] for index in range(len(grid))] == expected
+    assert grid[-1] == expected[-1]
+
+
+def test_hash_view_round_trip():
+    grid = _grid([('arg1', range(4)), ('arg2', range(5))])
+    for index, item_hash in enumerate(grid.hashes()):
+        assert item_hash == simset.hash_to_filename(grid[index])
+        assert grid.index_of(item_hash) == index
+        assert grid.by_hash[item_hash] == grid[index]
+    assert len(grid.by_hash) == 20
+    assert "0" * 64 not in grid.by_hash
+
+
+def test_empty_grid():
+    grid = Grid()
+    assert len(grid) == 0
+    assert list(grid) == []
+    grid.add_axis('arg1', [])
+    assert len(grid) == 0
+    assert list(itertools.islice(grid.hashes(), 1)) == []
@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import time
+from simset import ledger
+
+
+def _result(folder, item_hash):
+    (folder / f"{item_hash}.data").write_bytes(b"result")
+
+
+def test_record_and_completed(data_folder):
+    assert ledger.completed() == set()
+    _result(data_folder, "a" * 64)
+    ledger.record("a" * 64, {"time": 1.0})
+    assert ledger.completed() == {"a" * 64}
+    assert ledger.records()["a" * 64] == {"time": 1.0}
+
+
+def test_truncated_line_is_ignored(data_folder):
+    ledger.record("a" * 64)
+    with open(ledger.ledger_filename(), "ab") as f:
+        f.write(b"b" * 32)
+    # keep the ledger newer than the data folder so no reindex happens
+    os.utime(ledger.ledger_filename())
+    assert ledger.completed() == {"a" * 64}
+
+
+def test_reindex_picks_up_copied_results(data_folder):
+    _result(data_folder, "a" * 64)
+    ledger.record("a" * 64, {"time": 2.0})
+    # results copied in behind the ledger's back, e.g. by rsync
+    _result(data_folder, "b" * 64)
+    os.utime(ledger.ledger_filename(), ns=(0, 0))
+    assert ledger.completed() == {"a" * 64, "b" * 64}
+    assert ledger.records()["a" * 64] == {"time": 2.0}
+
+
+def test_missing_and_manifest_records(data_folder, tmp_path):
+    _result(data_folder, "a" * 64)
+    ledger.record("a" * 64, {"time": 1.0})
+    manifest = tmp_path / "remote.log"
+    manifest.write_text(f"{'a' * 64}\t{{}}\n{'b' * 64}\t{{\"time\": 3.0}}\n")
+    assert ledger.missing(str(manifest)) == [f"{'b' * 64}.data"]
+
+    # the missing result arrives and its remote record is kept
+    _result(data_folder, "b" * 64)
+    assert ledger.reindex(str(manifest)) == 2
+    assert ledger.records() == {"a" * 64: {"time": 1.0}, "b" * 64: {"time": 3.0}}
+
+
+def test_record_after_truncated_line_is_kept(data_folder):
+    # a record cut off within its info and one cut off within its hash
+    for truncated, item_hash in [(b"a" * 64 + b'\t{"time": 1', "b"), (b"c" * 20, "d")]:
+        with open(ledger.ledger_filename(), "ab") as f:
+            f.write(truncated)
+        ledger.record(item_hash * 64, {"time": 2.0})
+    os.utime(ledger.ledger_filename())
+    assert ledger.records() == {
+        "a" * 64: {},
+        "b" * 64: {"time": 2.0},
+        "d" * 64: {"time": 2.0},
+    }
+
+
+def test_setup_keeps_the_ledger_fresh(sweep):
+    from simset.simulate import _write_tasks
+
+    sweep(a=[1, 2])
+    _write_tasks()
+    ledger.record("a" * 64)
+    os.utime(ledger.ledger_filename())
+    assert not ledger._stale()
+    time.sleep(0.01)
+    _write_tasks()
+    assert not ledger._stale()
+
+
+def test_removed_results_leave_the_ledger(data_folder):
+    for item_hash in ["a" * 64, "b" * 64]:
+        _result(data_folder, item_hash)
+        ledger.record(item_hash, {"time": 1.0})
+    (data_folder / f"{'a' * 64}.data").unlink()
+    os.utime(ledger.ledger_filename(), ns=(0, 0))
+    assert ledger.completed() == {"b" * 64}
+    # simulated again after its removal
+    _result(data_folder, "a" * 64)
+    ledger.record("a" * 64)
+    assert ledger.records() == {"a" * 64: {}, "b" * 64: {"time": 1.0}}
+
+
+def _record_results(folder, writer):
+    for number in range(300):
+        item_hash = f"{writer:032x}{number:032x}"
+        _result(folder, item_hash)
+        ledger.record(item_hash, {"writer": writer})
+        if number % 2 == 0:
+            # reindexes whenever another writer saved a result since
+            ledger.completed()
+
+
+def test_reindex_keeps_concurrent_records(data_folder):
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_record_results, args=(data_folder, writer))
+        for writer in range(8)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    records = ledger.records()
+    assert len(records) == 8 * 300
+    assert all(record.get("writer") is not None for record in records.values())
+
+
+def test_record_appended_during_reindex_is_kept(data_folder, monkeypatch):
+    _result(data_folder, "a" * 64)
+    scan = ledger._data_files
+
+    def finishing_during_scan():
+        yield from scan()
+        _result(data_folder, "b" * 64)
+        ledger.record("b" * 64, {"time": 1.0})
+
+    monkeypatch.setattr(ledger, "_data_files", finishing_during_scan)
+    assert ledger.reindex() == 1
+    monkeypatch.setattr(ledger, "_data_files", scan)
+    assert ledger._stale()
+    assert ledger.records() == {"a" * 64: {}, "b" * 64: {"time": 1.0}}
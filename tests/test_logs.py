@@ -0,0 +1,64 @@
+import os
+import simset
+from simset import logs
+from simset.simulate import _simulate_indices, _write_tasks
+
+
+def _simulate(a):
+    os.write(1, f"simulating {a}\n".encode())
+    if a == 2:
+        raise ValueError(a)
+    return a
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_logs_are_found_by_exact_index_and_hash(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first, second, third = "a" * 64, "b" * 64, "c" * 64
+    _write(tmp_path / "local" / "out" / f"1.{first}.out", "one\n")
+    _write(tmp_path / "local" / "out" / f"11.{second}.out", "eleven\n")
+    _write(tmp_path / "local" / "out" / "nested" / f"1.{first}.out", "nested\n")
+    _write(tmp_path / "local" / "out" / "2.out", "by index only\n")
+    _write(tmp_path / "pool" / "out" / f"1.{third}.out", "pool\n")
+
+    # without a task table every log of the index
+    assert logs.find("out", 1, "local") == [f"local/out/1.{first}.out"]
+    assert len(logs.find("out", 1)) == 2
+    assert logs.find("out", 2) == ["local/out/2.out"]
+    assert logs.find_hash("out", third) == [f"pool/out/1.{third}.out"]
+    assert sorted(logs.index("out"), key=str) == [
+        ("local", 1, first),
+        ("local", 11, second),
+        ("local", 2, None),
+        ("pool", 1, third),
+    ]
+    assert logs.summary("out")["local"]["logs"] == 3
+    assert list(logs.grep("out", "^one|pool")) == [
+        ("local", 1, 1, "one"),
+        ("pool", 1, 1, "pool"),
+    ]
+    assert logs.tail("a\nb\nc\n", 2) == "b\nc"
+
+
+def test_logs_follow_the_hash_across_setups(sweep, save):
+    grid = sweep(a=[1, 2, 3])
+    _write_tasks()
+    assert _simulate_indices(_simulate, [1, 2], save, "local") == [2]
+    first, second, _ = (simset.hash_to_filename(args) for args in grid)
+    assert logs.read(logs.find("out", 1)[0]) == "simulating 1\n"
+    assert logs.find_hash("out", second) == [f"local/out/2.{second}.out"]
+
+    assert logs.compress("local") == 4
+    assert logs.find("out", 1) == [f"local/out/1.{first}.out.gz"]
+    assert logs.read(logs.find("out", 1)[0]) == "simulating 1\n"
+    assert logs.failed() == [(second, 2, [f"local/err/2.{second}.err.gz"])]
+
+    # set up again, the failed simulation is task 1 now and has no log as such
+    _write_tasks()
+    assert logs.find("out", 1) == [] and logs.find("out", 2) == []
+    assert logs.find_hash("out", second) == [f"local/out/2.{second}.out.gz"]
+    assert logs.failed()[0][2] == [f"local/err/2.{second}.err.gz"]
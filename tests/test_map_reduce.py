@@ -0,0 +1,60 @@
+import operator
+import pickle
+import pytest
+import simset
+from simset.map_reduce import aggregate_filename, map_reduce
+
+
+def _load(filename):
+    with open(filename, "rb") as f:
+        _loaded.append(filename)
+        return pickle.load(f)
+
+
+_loaded = []
+
+
+def _square(result):
+    return result**2
+
+
+@pytest.fixture()
+def grid(sweep):
+    return sweep(a=list(range(10)))
+
+
+def _simulate(grid, save, indices, offset=0):
+    for index in indices:
+        args = grid[index]
+        item_hash = simset.hash_to_filename(args)
+        simset.store.write_result(item_hash, args[1][0] + offset, save)
+        simset.ledger.record(item_hash, {"offset": offset})
+
+
+def test_incremental_aggregate(grid, save):
+    assert map_reduce(_square, operator.add, _load, workers=2) is None
+    _simulate(grid, save, range(5))
+    assert map_reduce(_square, operator.add, _load, workers=2) == 30
+
+    # only the new results are loaded, in this process since workers=1
+    _simulate(grid, save, range(5, 10))
+    _loaded.clear()
+    assert map_reduce(_square, operator.add, _load, workers=1) == 285
+    assert len(_loaded) == 5
+
+    # a result simulated again replaces its cached value
+    _simulate(grid, save, [0], offset=10)
+    _loaded.clear()
+    assert map_reduce(_square, operator.add, _load, workers=1) == 385
+    assert len(_loaded) == 1
+    assert map_reduce(_square, operator.add, _load, fresh=True) == 385
+
+
+def test_editing_the_map_function_starts_a_new_cache(grid):
+    def _mapped(result):
+        return result**2
+
+    filename = aggregate_filename(_mapped, operator.add)
+    assert aggregate_filename(_mapped, operator.add) == filename
+    _mapped.__code__ = (lambda result: result**3).__code__
+    assert aggregate_filename(_mapped, operator.add) != filename
@@ -0,0 +1,38 @@
+import pytest
+import simset
+from simset.pool import run
+
+
+def _simulate(a):
+    if a == 2:
+        raise ValueError(a)
+    return a
+
+
+@pytest.fixture
+def grid(sweep, monkeypatch):
+    monkeypatch.setattr(simset, "memory_admission", False)
+    return sweep(a=[1, 2, 3])
+
+
+def test_fork_server_marks_failures(grid, save):
+    failed = run(_simulate, save, workers=2, fork=True)
+
+    records = simset.ledger.records()
+    failures = simset.ledger.failures()
+    assert len(records) == 2 and len(failures) == 1
+    failure = list(failures.values())[0]
+    assert failure["error"] == "ValueError"
+    assert failed == [failure["index"]]
+    assert {record["index"] for record in records.values()} | set(failed) == {1, 2, 3}
+
+
+def test_pool_marks_failures(grid, save):
+    failed = run(_simulate, save, workers=2, chunk_size=2)
+
+    records = simset.ledger.records()
+    failures = simset.ledger.failures()
+    assert len(records) == 2 and len(failures) == 1
+    assert failed == [list(failures.values())[0]["index"]]
+    assert {record["index"] for record in records.values()} | set(failed) == {1, 2, 3}
+    assert run(_simulate, save, workers=2) == [1]
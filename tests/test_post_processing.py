@@ -0,0 +1,61 @@
+import pytest
+import simset
+
+
+@pytest.fixture()
+def results(sweep, save):
+    grid = sweep(a=list(range(20)), b=["x"])
+    for args in grid:
+        item_hash = simset.hash_to_filename(args)
+        simset.store.write_result(item_hash, args[1][1], save)
+        simset.ledger.record(item_hash)
+    return list(range(20))
+
+
+@pytest.mark.parametrize("processes", [False, True])
+@pytest.mark.parametrize("ordered", [False, True])
+def test_prefetched_results(results, load, monkeypatch, processes, ordered):
+    monkeypatch.setattr(simset, "prefetch_workers", 3)
+    monkeypatch.setattr(simset, "prefetch_window", 4)
+    monkeypatch.setattr(simset, "prefetch_ordered", ordered)
+    monkeypatch.setattr(simset, "prefetch_processes", processes)
+    processed = []
+    simset.post_processing.post_processing(processed.extend, load)
+    if ordered:
+        assert processed == results
+    assert sorted(processed) == results
+
+
+def test_consumer_may_stop_early(results, load, monkeypatch):
+    monkeypatch.setattr(simset, "prefetch_workers", 2)
+    first = []
+    simset.post_processing.post_processing(
+        lambda loaded: first.append(next(loaded)), load
+    )
+    assert first == [0]
+
+
+def test_where_onlyloads_matching_results(results, load):
+    loaded = []
+
+    def counted(filename):
+        loaded.append(filename)
+        return load(filename)
+
+    processed = []
+    simset.post_processing.post_processing(
+        processed.extend, counted, where={"a": lambda a: a % 5 == 0, "b": "x"}
+    )
+    assert processed == [0, 5, 10, 15] and len(loaded) == 4
+
+    simset.post_processing.post_processing(
+        processed.extend,
+        load,
+        where=simset.post_processing.parse_where(["a=3", "a=4", "b=x"]),
+        with_args=True,
+    )
+    assert processed[4:] == [({"a": 3, "b": "x"}, 3), ({"a": 4, "b": "x"}, 4)]
+    assert processed[-1].args["a"] == processed[-1].result
+
+    with pytest.raises(Exception):
+        simset.post_processing.post_processing(print, load, where={"c": 1})
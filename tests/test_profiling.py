@@ -0,0 +1,25 @@
+import simset
+from simset import profiling
+from simset.simulate import _execute, _profile_filename
+
+
+def _simulate(a):
+    return sum(range(a * 1000))
+
+
+def test_merge_profiles_of_a_subset(sweep, save, tmp_path):
+    grid = sweep(a=[1, 2, 3])
+    for index, args in enumerate(grid, 1):
+        item_hash = simset.hash_to_filename(args)
+        filename = _profile_filename("pool", index, item_hash)
+        _execute(_simulate, item_hash, args, save, filename)
+
+    assert len(list(profiling.profile_files())) == 3
+    stats = profiling.merge("all.pstats")
+    assert (tmp_path / "all.pstats").exists()
+    calls = [value[0] for key, value in stats.stats.items() if key[2] == "_simulate"]
+    assert calls == [3]
+
+    stats = profiling.merge("some.pstats", where={"a": [1, 3]})
+    calls = [value[0] for key, value in stats.stats.items() if key[2] == "_simulate"]
+    assert calls == [2]
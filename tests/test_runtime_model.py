@@ -0,0 +1,24 @@
+from simset.grid import Grid
+from simset.runtime_model import RuntimeModel, pack
+
+
+def test_model_recovers_multiplicative_runtimes():
+    grid = Grid()
+    grid.add_axis('size', [1, 10, 100])
+    grid.add_axis('method', ['fast', 'slow'])
+    factor = {'fast': 1.0, 'slow': 4.0}
+    samples = [(args, args[1][1] * factor[args[1][0]]) for args in grid]
+    model = RuntimeModel.fit(samples)
+    for args, duration in samples:
+        assert abs(model.predict(args) - duration) < 1e-6 * duration
+    # unseen values fall back to the effects of the known axes
+    assert model.predict((('method', 'size'), ('slow', 1000))) > 0
+
+
+def test_pack_balances_chunks():
+    durations = [10.0, 9.0, 8.0, 3.0, 2.0, 1.0]
+    order = pack(list(range(6)), durations, [3, 3])
+    chunks = [order[:3], order[3:]]
+    loads = [sum(durations[task] for task in chunk) for chunk in chunks]
+    assert sorted(order) == list(range(6))
+    assert max(loads) - min(loads) <= 3.0
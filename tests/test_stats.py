@@ -0,0 +1,51 @@
+import simset
+from simset import stats
+from simset.simulate import _execute
+
+
+def _simulate(a, b):
+    if b == "fail":
+        raise ValueError(b)
+    return [a] * 1000
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert stats.percentile(values, 50) == 50
+    assert stats.percentile(values, 99) == 99
+    assert stats.percentile([3.0], 90) == 3.0
+    assert stats.summary([]) == {"count": 0}
+
+
+def test_executions_are_accounted(sweep, save, monkeypatch):
+    grid = sweep(a=[1, 2], b=["ok", "fail"])
+    monkeypatch.setattr(simset.simulate, "_executed", 0)
+    for args in grid:
+        item_hash = simset.hash_to_filename(args)
+        try:
+            _execute(_simulate, item_hash, args, save)
+        except ValueError:
+            pass
+
+    simulations = stats.finished()
+    assert [args for args, _ in simulations] == [
+        {"a": 1, "b": "ok"},
+        {"a": 2, "b": "ok"},
+    ]
+    for _, record in simulations:
+        assert record["status"] == 0 and record["size"] > 1000
+        assert {"time", "user", "sys"} <= set(record)
+    # the peak RSS of the process only belongs to its first simulation
+    assert ["max_rss" in record for _, record in simulations] == [True, False]
+    assert [record["error"] for record in simset.ledger.failures().values()] == [
+        "ValueError",
+        "ValueError",
+    ]
+    assert stats.overall(simulations)["size"]["count"] == 2
+    assert set(stats.by_axis(simulations)["a"]) == {1, 2}
+    assert len(stats.slowest(simulations, 1)) == 1
+
+
+def test_by_axis_of_list_arguments():
+    simulations = [({"a": [1, 2]}, {"time": 1.0}), ({"a": [1, 2]}, {"time": 3.0})]
+    assert stats.by_axis(simulations)["a"]["[1, 2]"]["mean"] == 2.0
@@ -0,0 +1,71 @@
+import multiprocessing
+import pickle
+import pytest
+import simset
+from simset import store, threads
+
+
+@pytest.fixture()
+def packed(data_folder, monkeypatch):
+    monkeypatch.setattr(simset, "result_store", "packed")
+    return data_folder
+
+
+def _write(start, save, slot=None):
+    if slot is not None:
+        threads.pin(slot, 1)
+    for value in range(start, start + 25):
+        store.write_result(simset.hash_to_filename(value), [value] * value, save)
+
+
+def test_concurrent_packed_writers(packed, save, load):
+    context = multiprocessing.get_context("fork")
+    # two writers in job slots, two identified by their process
+    processes = [
+        context.Process(target=_write, args=(25 * n, save, n if n < 2 else None))
+        for n in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    writers = {path.stem.split("-")[-1] for path in (packed / "packs").iterdir()}
+    assert len(writers) == 4 and {"slot0", "slot1"} <= writers
+    assert not list(packed.glob("*.data"))
+    assert len(set(store.packed_hashes())) == 100
+    for value in range(100):
+        item_hash = simset.hash_to_filename(value)
+        assert store.load_result(item_hash, load) == [value] * value
+        assert store.result_size(item_hash) == len(pickle.dumps([value] * value))
+
+
+def test_rewritten_result_wins(packed, save, load, monkeypatch):
+    item_hash = simset.hash_to_filename("x")
+    store.write_result(item_hash, "old", save)
+    assert store.write_result(item_hash, "new", save) == len(pickle.dumps("new"))
+    assert store.load_result(item_hash, load) == "new"
+    # written again by a writer in a pack of its own
+    monkeypatch.setattr(threads, "_current_slot", 7)
+    store.write_result(item_hash, "newest", save)
+    monkeypatch.setattr(store, "_index", {})
+    monkeypatch.setattr(store, "_index_offsets", {})
+    monkeypatch.setattr(store, "_index_times", {})
+    assert store.load_result(item_hash, load) == "newest"
+    assert simset.ledger.reindex() == 1
+
+
+def test_downloaded_packs_are_read_in_place(packed, save, load, monkeypatch):
+    # the packs of a remote, named like the local ones
+    store.write_result(simset.hash_to_filename("remote"), "remote", save)
+    remote = packed / "sync" / "user@remote"
+    remote.mkdir(parents=True)
+    (packed / "packs").rename(remote / "packs")
+    store.write_result(simset.hash_to_filename("local"), "local", save)
+    monkeypatch.setattr(store, "_index", {})
+    monkeypatch.setattr(store, "_index_offsets", {})
+    monkeypatch.setattr(store, "_index_times", {})
+
+    assert store.load_result(simset.hash_to_filename("remote"), load) == "remote"
+    assert store.load_result(simset.hash_to_filename("local"), load) == "local"
+    assert simset.ledger.reindex() == 2
@@ -0,0 +1,29 @@
+import pytest
+import simset
+from simset.grid import Grid
+from simset.task_table import TaskTable, write_task_table
+
+
+def test_task_table_round_trip(tmp_path):
+    grid = Grid()
+    grid.add_axis('arg1', [1, 2, 3])
+    grid.add_axis('arg2', ['a', None, (1, 2.5)])
+    filename = str(tmp_path / "tasks.bin")
+
+    assert write_task_table(grid.items(), filename) == len(grid)
+
+    with TaskTable(filename) as table:
+        assert len(table) == len(grid)
+        for index, (item_hash, args) in enumerate(grid.items()):
+            assert table.hash(index) == item_hash
+            assert table[index] == (item_hash, args)
+        with pytest.raises(IndexError):
+            table[len(grid)]
+
+
+def test_empty_task_table(tmp_path):
+    filename = str(tmp_path / "tasks.bin")
+    assert write_task_table([], filename) == 0
+    with TaskTable(filename) as table:
+        assert len(table) == 0
+        assert list(table) == []
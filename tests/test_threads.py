@@ -0,0 +1,34 @@
+import os
+import pytest
+import simset
+from simset import threads
+from simset.pool import run
+
+
+def _environment(a):
+    return {
+        variable: os.environ.get(variable) for variable in threads._thread_variables
+    }
+
+
+def test_threads_per_job(monkeypatch):
+    monkeypatch.setattr(simset, "threads_per_job", None)
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert threads.threads_per_job(2) == 4
+    assert threads.threads_per_job(16) == 1
+    monkeypatch.setattr(simset, "threads_per_job", 3)
+    assert threads.threads_per_job(2) == 3
+    assert threads.export_command(3)["command"].startswith("export OMP_NUM_THREADS=3")
+
+
+@pytest.mark.parametrize("fork", [False, True])
+def test_pool_workers_limit_threads(sweep, save, load, monkeypatch, fork):
+    sweep(a=[1, 2])
+    monkeypatch.setattr(simset, "threads_per_job", 3)
+
+    assert run(_environment, save, workers=2, fork=fork) == []
+    records = simset.ledger.records()
+    assert len(records) == 2
+    for item_hash in records:
+        environment = simset.store.load_result(item_hash, load)
+        assert environment == dict.fromkeys(threads._thread_variables, "3")
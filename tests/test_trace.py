@@ -0,0 +1,38 @@
+import json
+import simset
+from simset import trace
+from simset.simulate import _execute
+
+
+def _simulate(a):
+    if a == 3:
+        raise ValueError(a)
+    return a
+
+
+def test_trace_of_recorded_simulations(sweep, save, tmp_path):
+    grid = sweep(a=[1, 2, 3])
+    for args in grid:
+        try:
+            _execute(_simulate, simset.hash_to_filename(args), args, save)
+        except ValueError:
+            pass
+
+    filename = str(tmp_path / "trace.json")
+    assert trace.export(filename) > 0
+    with open(filename) as f:
+        events = json.load(f)["traceEvents"]
+    names = [event["name"] for event in events]
+    assert names.count("task") == 2 and names.count("compute") == 2
+    assert names.count("failed") == 1 and names.count("process_name") == 1
+    tasks = [event for event in events if event["name"] == "task"]
+    assert sorted(task["args"]["a"] for task in tasks) == [1, 2]
+    for task in tasks:
+        phases = [
+            event
+            for event in events
+            if event["name"] in ("load", "compute", "save")
+            and task["ts"] <= event["ts"] <= task["ts"] + task["dur"]
+            and event["tid"] == task["tid"]
+        ]
+        assert sum(phase["dur"] for phase in phases) <= task["dur"] + 3
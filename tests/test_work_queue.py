@@ -0,0 +1,72 @@
+import os
+import time
+import pytest
+import simset
+from simset import work_queue
+from simset.simulate import _write_tasks
+from simset.work_queue import _busy, _claim, _claimed, _done
+
+
+def _simulate(a):
+    if a == 2:
+        raise ValueError(a)
+    return a
+
+
+@pytest.fixture
+def queue(data_folder, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(work_queue._claims_folder())
+    return data_folder / "queue"
+
+
+def _age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_claims_are_exclusive_until_done(queue):
+    assert _claim("a", "worker1", 60) == _claimed
+    assert _claim("a", "worker2", 60) == _busy
+    work_queue._write_claim(str(queue / "a.claim"), "failed")
+    assert _claim("a", "worker2", 60) == _done
+
+
+def test_expired_claims_are_stolen(queue):
+    assert _claim("a", "worker1", 60) == _claimed
+    _age(queue / "a.claim", 120)
+    assert _claim("a", "worker2", 60) == _claimed
+    assert (queue / "a.claim").read_text() == "worker2"
+    assert not (queue / "a.claim.steal").exists()
+    assert _claim("a", "worker1", 60) == _busy
+
+
+def test_steal_lock_of_dead_worker(queue):
+    assert _claim("a", "worker1", 60) == _claimed
+    _age(queue / "a.claim", 120)
+    (queue / "a.claim.steal").write_text("worker2")
+    assert _claim("a", "worker3", 60) == _busy
+
+    _age(queue / "a.claim.steal", 120)
+    assert _claim("a", "worker3", 60) == _busy
+    assert not (queue / "a.claim.steal").exists()
+    # another worker removing the same stale lock first is no error
+    work_queue._remove(str(queue / "a.claim.steal"))
+    assert _claim("a", "worker3", 60) == _claimed
+
+
+def test_work_drains_the_queue(queue, sweep, save):
+    sweep(a=[1, 2, 3])
+    _write_tasks()
+
+    work_queue.work(_simulate, save, lease=60)
+    assert len(simset.ledger.records()) == 2
+    claims = sorted(path.read_text() for path in queue.iterdir())
+    assert claims == ["done", "done", "failed"]
+
+    # the failed claim is kept until the claims are reset
+    work_queue.work(_simulate, save, lease=60)
+    with open(simset.ledger.failures_filename()) as f:
+        assert len(f.readlines()) == 1
+    work_queue.reset()
+    assert not queue.exists()